@@ -0,0 +1,194 @@
+import json
+import sys
+from enum import Enum
+from typing import Any, Dict, Optional, Union
+
+from structured_logging import get_logger
+
+log = get_logger('alerts')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    log.warning('orjson is not installed, alerts are decoded with the slower json module (pip install -r requirements.txt)')
+
+# Spellings of booleans in string payloads
+_TRUE_STRINGS = ('true', '1', 'yes')
+_FALSE_STRINGS = ('false', '0', 'no', 'none', 'null', '')
+
+
+class Side(str, Enum):
+    BUY = 'buy'
+    SELL = 'sell'
+
+
+class OrderType(str, Enum):
+    MARKET = 'market'
+    LIMIT = 'limit'
+    STOP_LIMIT = 'stopLimit'
+
+
+class Comment(str, Enum):
+    OPEN_LONG = 'openlong'
+    OPEN_SHORT = 'openshort'
+    SET_TAKE_PROFIT = 'set take profit'
+    CLOSE_LONG = 'closelong'
+    CLOSE_SHORT = 'closeshort'
+
+
+OPENING_COMMENTS = (Comment.OPEN_LONG, Comment.OPEN_SHORT)
+CLOSING_COMMENTS = (Comment.SET_TAKE_PROFIT, Comment.CLOSE_LONG, Comment.CLOSE_SHORT)
+
+
+# Enum members by lowercase value, so 'Market' or 'OpenLong' match as well
+_MEMBERS = {enum_cls: {member.value.lower(): member for member in enum_cls} for enum_cls in (Side, OrderType, Comment)}
+
+
+def _enum_value(enum_cls, value: Any, field: str, strict: bool = True):
+    """
+    Match a payload value to an enum member, ignoring case.
+
+    :param strict: Reject values outside the enum, otherwise they are kept as the raw string.
+    """
+    if value is None:
+        raise ValueError(f"Alert is missing '{field}'")
+    member = _MEMBERS[enum_cls].get(str(value).lower())
+    if member is not None:
+        return member
+    if strict:
+        raise ValueError(f"Invalid {field} '{value}', expected one of {[member.value for member in enum_cls]}")
+    return str(value)
+
+
+def wire_value(value: Union[Enum, str, None]) -> Optional[str]:
+    """
+    The payload string of an alert field: the enum's value, or the raw string the alert carried outside the enum.
+    """
+    return value.value if isinstance(value, Enum) else value
+
+
+def _float_value(value: Any, field: str) -> float:
+    if value is None:
+        raise ValueError(f"Alert is missing '{field}'")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {field} '{value}', expected a number")
+
+
+def _bool_value(value: Any, field: str) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+        raise ValueError(f"Invalid {field} '{value}', expected a boolean")
+    return bool(value)
+
+
+class Alert:
+    """
+    A trading alert, decoded and validated once when it arrives from the server.
+
+    Symbol and exchange strings are interned, so the many alerts of a burst share them, and side,
+    order type and comment are enums. Order types and comments outside their enum are kept as the raw
+    string: the order type is passed on to the exchange as sent, and an unknown comment only skips the
+    position bookkeeping.
+
+    :param symbol: Trading pair (e.g. 'BTC/USDT:USDT').
+    :param exchange: Lowercase exchange identifier.
+    :param side: Order side.
+    :param order_type: Order type, the raw string if not one of OrderType.
+    :param qty_perc: Percentage of the balance or position to trade.
+    :param price: Alert price.
+    :param reduce_only: Whether the order only reduces a position, None if not sent.
+    :param stop_price: Stop price for stoploss orders, None if not sent.
+    :param comment: Strategy comment driving position bookkeeping, the raw string if not one of Comment, None if not sent.
+    """
+
+    __slots__ = ('symbol', 'exchange', 'side', 'order_type', 'qty_perc', 'price', 'reduce_only', 'stop_price', 'comment')
+
+    def __init__(self, symbol: str, exchange: str, side: Side, order_type: Union[OrderType, str], qty_perc: float, price: float,
+                 reduce_only: Optional[bool] = None, stop_price: Optional[float] = None, comment: Union[Comment, str, None] = None):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.side = side
+        self.order_type = order_type
+        self.qty_perc = qty_perc
+        self.price = price
+        self.reduce_only = reduce_only
+        self.stop_price = stop_price
+        self.comment = comment
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Alert':
+        """
+        Build and validate an alert from the server payload.
+
+        :param data: One entry of the 'new_updates' data list.
+        :return: The validated alert.
+        :raise ValueError: If a required field is missing, the side is invalid or a number or boolean does not parse.
+        """
+        symbol = data.get('symbol')
+        exchange = data.get('exchange')
+        if not symbol:
+            raise ValueError("Alert is missing 'symbol'")
+        if not exchange:
+            raise ValueError("Alert is missing 'exchange'")
+
+        reduce_only = data.get('reduceOnly')
+        stop_price = data.get('stopPrice')
+        comment = data.get('comment')
+        # Payloads may spell a missing stop price as a string, e.g. "false"
+        if isinstance(stop_price, str) and stop_price.strip().lower() in _FALSE_STRINGS:
+            stop_price = None
+        return cls(
+            symbol=sys.intern(symbol),
+            exchange=sys.intern(exchange.lower()),
+            side=_enum_value(Side, data.get('side'), 'side'),
+            order_type=_enum_value(OrderType, data.get('order_type'), 'order_type', strict=False),
+            qty_perc=_float_value(data.get('qty_perc'), 'qty_perc'),
+            price=_float_value(data.get('price'), 'price'),
+            reduce_only=None if reduce_only is None else _bool_value(reduce_only, 'reduceOnly'),
+            stop_price=stop_price if not stop_price else _float_value(stop_price, 'stopPrice'),
+            comment=None if comment is None else _enum_value(Comment, comment, 'comment', strict=False),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the alert in the server's payload format, e.g. for logging.
+        """
+        return {
+            'symbol': self.symbol,
+            'exchange': self.exchange,
+            'side': self.side.value,
+            'order_type': wire_value(self.order_type),
+            'qty_perc': self.qty_perc,
+            'price': self.price,
+            'reduceOnly': self.reduce_only,
+            'stopPrice': self.stop_price,
+            'comment': wire_value(self.comment),
+        }
+
+    def __repr__(self) -> str:
+        return f"Alert({self.to_dict()})"
+
+
+class _OrjsonCodec:
+    """
+    json-module compatible wrapper around orjson, for socketio.Client(json=...).
+    """
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(data, **kwargs) -> Any:
+        return orjson.loads(data)
+
+
+# Fastest available JSON module for decoding Socket.IO packets
+json_codec = _OrjsonCodec if orjson is not None else json
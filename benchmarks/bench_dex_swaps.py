@@ -0,0 +1,100 @@
+"""
+Alert-to-receipt latency, RPC calls per order and burst throughput of DexTradingClient, on an in-process
+EVM with Uniswap-V2 compatible pools (see local_evm.py). Needs the packages of benchmarks/requirements.txt.
+
+Wallets opt into unlimited router approvals and trade once in each direction before measuring, so
+the one-off token approvals are not part of the numbers.
+
+Usage: python benchmarks/bench_dex_swaps.py [--orders N] [--wallets N] [--bursts N] [--rpc-latency-ms MS]
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+
+from local_evm import create_chain
+
+from alerts import Alert
+from client_websocket import dispatch_dex_alert
+from structured_logging import configure_logging
+
+SYMBOL = 'WETH/DAI'
+PRICE = 2000.0
+WALLET_BALANCES = {'WETH': 10.0, 'DAI': 20_000.0}
+
+
+def swap_alert(side: str, qty_perc: float = 5) -> Alert:
+    return Alert.from_dict({
+        'symbol': SYMBOL, 'exchange': 'uniswap', 'side': side, 'order_type': 'market',
+        'qty_perc': qty_perc, 'price': PRICE,
+    })
+
+
+def checked_order(client, alert: Alert) -> dict:
+    result = client.process_order(alert)
+    if result['status'] != 'success':
+        raise RuntimeError(f"{client.client_name}: {result['message']}")
+    return result
+
+
+def run_sequential(chain, client, orders: int):
+    """
+    One wallet, one alert at a time, alternating sells and buys.
+    """
+    latencies = []
+    calls = Counter()
+    for n in range(orders):
+        alert = swap_alert('sell' if n % 2 == 0 else 'buy')
+        chain.rpc.reset()
+        start = time.perf_counter()
+        checked_order(client, alert)
+        latencies.append(time.perf_counter() - start)
+        calls += chain.rpc.reset()
+    return latencies, calls
+
+
+def run_bursts(chain, clients: dict, bursts: int):
+    """
+    Every alert of a burst is dispatched to all wallets at once, as the websocket handler does.
+    """
+    chain.rpc.reset()
+    start = time.perf_counter()
+    for n in range(bursts):
+        dispatch_dex_alert(swap_alert('sell' if n % 2 == 0 else 'buy'), clients)
+    elapsed = time.perf_counter() - start
+    return elapsed, chain.rpc.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20, help='sequential orders of one wallet')
+    parser.add_argument('--wallets', type=int, default=8, help='wallets swapping concurrently in a burst')
+    parser.add_argument('--bursts', type=int, default=5, help='alerts dispatched to every wallet')
+    parser.add_argument('--rpc-latency-ms', type=float, default=0.0, help='delay added to every RPC, to emulate a remote node')
+    args = parser.parse_args()
+    configure_logging(level='WARNING')
+
+    setup_start = time.perf_counter()
+    chain = create_chain()
+    clients = {f"wallet{n}": chain.create_client(f"wallet{n}", WALLET_BALANCES) for n in range(args.wallets)}
+    for client in clients.values():
+        checked_order(client, swap_alert('sell', 1))
+        checked_order(client, swap_alert('buy', 1))
+    print(f"chain, pools and {args.wallets} wallets ready in {time.perf_counter() - setup_start:.1f} s")
+    chain.rpc.latency = args.rpc_latency_ms / 1000
+
+    latencies, calls = run_sequential(chain, next(iter(clients.values())), args.orders)
+    print(f"alert-to-receipt: median {statistics.median(latencies) * 1000:8.1f} ms   "
+          f"mean {statistics.mean(latencies) * 1000:8.1f} ms   max {max(latencies) * 1000:8.1f} ms")
+    print(f"RPC calls per order: {sum(calls.values()) / args.orders:.1f}")
+    for method, count in calls.most_common():
+        print(f"  {method:<28} {count / args.orders:5.1f}")
+
+    elapsed, calls = run_bursts(chain, clients, args.bursts)
+    swaps = args.bursts * args.wallets
+    print(f"burst throughput: {swaps} swaps in {elapsed:.2f} s = {swaps / elapsed:.1f} swaps/s "
+          f"({sum(calls.values()) / swaps:.1f} RPC calls per swap)")
+
+
+if __name__ == '__main__':
+    main()
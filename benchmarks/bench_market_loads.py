@@ -0,0 +1,117 @@
+"""
+Market metadata requests made per subaccount when TradingClients start, against a fake Bybit transport.
+
+Every client is built through the real constructor, so balance, position and order requests run as in
+production and any of them loading markets on its own instance is counted. Market and currency loading
+is counted where ccxt calls it, the other requests by API path.
+
+Usage: python benchmarks/bench_market_loads.py [--subaccounts N] [--markets N]
+"""
+import argparse
+import collections
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import ccxt
+
+# Benchmarks run as scripts from the repository root or the benchmarks folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_memory import synthetic_markets
+from exchange_resources import ExchangeResources
+from structured_logging import configure_logging
+from trade_store import TradeStore
+from trading_clients import TradingClient
+
+PAIR = 'BTC/USDT:USDT'
+MARKET_REQUESTS = ('fetch_markets', 'fetch_currencies')
+
+requests_made: collections.Counter = collections.Counter()
+
+
+def fake_response(exchange, path: str) -> dict:
+    """
+    A minimal v5-shaped answer of a Bybit endpoint: server time, a USDT balance, a flat position or an empty list.
+    """
+    now = exchange.milliseconds()
+    if path.endswith('/time'):
+        result = {'timeSecond': str(now // 1000), 'timeNano': str(now * 1000000)}
+    elif 'balance' in path:
+        result = {'list': [{'accountType': 'UNIFIED', 'coin': [{'coin': 'USDT', 'walletBalance': '1000', 'equity': '1000'}]}]}
+    elif 'position/list' in path:
+        result = {'category': 'linear', 'list': [{'symbol': 'BTCUSDT', 'side': 'None', 'size': '0', 'avgPrice': '0',
+                                                  'leverage': '10', 'createdTime': str(now), 'updatedTime': str(now)}]}
+    else:
+        result = {'list': [], 'nextPageCursor': ''}
+    return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': {}, 'time': now}
+
+
+def install_fake_transport(markets: int) -> None:
+    """
+    Serve every Bybit request locally, counting market loads and requests by path.
+    """
+    def fetch_markets(exchange, params={}):
+        requests_made['fetch_markets'] += 1
+        return synthetic_markets(markets)
+
+    def fetch_currencies(exchange, params={}):
+        requests_made['fetch_currencies'] += 1
+        return {}
+
+    def fetch(exchange, url, method='GET', headers=None, body=None):
+        path = url.split('?')[0].split('.com', 1)[-1]
+        requests_made[path] += 1
+        return fake_response(exchange, path)
+
+    ccxt.bybit.fetch_markets = fetch_markets
+    ccxt.bybit.fetch_currencies = fetch_currencies
+    ccxt.bybit.fetch = fetch
+
+
+def write_credentials(subaccounts: int) -> str:
+    """
+    A credentials file with `subaccounts` subaccounts trading one pair.
+    """
+    credentials = {'bybit': {'sub_acc': {
+        f"sub{n}": {'apiKey': f"key{n}", 'secret': f"secret{n}", 'market_type': 'swap', 'pair_supported': [PAIR]}
+        for n in range(subaccounts)
+    }}}
+    path = os.path.join(tempfile.mkdtemp(), 'credentials.json')
+    with open(path, 'w') as file:
+        json.dump(credentials, file)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subaccounts', type=int, default=10, help='clients started on one exchange host')
+    parser.add_argument('--markets', type=int, default=500, help='markets listed by the exchange')
+    args = parser.parse_args()
+    configure_logging(level='WARNING')
+    install_fake_transport(args.markets)
+    credentials_path = write_credentials(args.subaccounts)
+
+    resources = ExchangeResources()
+    trade_store = TradeStore(':memory:')
+    per_client = []
+    for n in range(args.subaccounts):
+        before = requests_made.copy()
+        with contextlib.redirect_stdout(io.StringIO()):
+            TradingClient('bybit', f"sub{n}", credentials_path=credentials_path, resources=resources, trade_store=trade_store)
+        per_client.append(requests_made - before)
+
+    further = per_client[1:] or per_client
+    print(f"{args.subaccounts} subaccounts, {args.markets} markets")
+    print(f"{'requests':<24}{'first client':>14}{'each further':>14}")
+    for name in MARKET_REQUESTS:
+        print(f"{name:<24}{per_client[0][name]:>14}{sum(c[name] for c in further) / len(further):>14.1f}")
+    other = [sum(count for name, count in c.items() if name not in MARKET_REQUESTS) for c in per_client]
+    print(f"{'other requests':<24}{other[0]:>14}{sum(other[1:] or other) / len(further):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Memory held per subaccount by TradingClient, measured with tracemalloc.
+
+Compares three layouts of the same subaccounts:
+- baseline: TradingClient as it was before the performance work, a plain ccxt instance loading its own
+  markets, the whole fetch_balance result and per-pair dicts,
+- shared markets: the baseline client with its session and markets shared through ExchangeResources,
+- lean: the current TradingClient, slotted, sharing the exchange description and markets, with the
+  balance pruned to the traded currencies.
+
+Clients are built offline from synthetic markets and balances shaped like Bybit's linear perpetuals and
+unified account, so no credentials or network are needed. Each lean client then runs one order's worth
+of tasks on the process-wide executors, so the worker threads orders start exist while memory is
+measured; the baseline client ran orders on the caller's thread and has none.
+tracemalloc does not see thread stacks, so the resident set size (RSS) grown per client is reported as
+well. Every layout is measured in a fresh interpreter.
+
+Usage: python benchmarks/bench_memory.py [--subaccounts N] [--markets N] [--coins N] [--pairs N]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import tracemalloc
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional
+
+import ccxt
+
+# Benchmarks run as scripts from the repository root or the benchmarks folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock_sync import exchange_host
+from exchange_resources import ExchangeResources
+from resilience import CircuitBreaker, get_breaker
+from structured_logging import configure_logging
+import trading_clients
+from trading_clients import SUBACCOUNT_FAILURES, PairState, TradingClient, traded_currencies
+
+CREDENTIALS = {'apiKey': 'benchmark-key', 'secret': 'benchmark-secret', 'market_type': 'swap'}
+BASES = ['BTC', 'ETH', 'SOL', 'XRP', 'DOGE', 'ADA', 'AVAX', 'LINK', 'DOT', 'MATIC']
+
+
+def base_currency(n: int) -> str:
+    return BASES[n] if n < len(BASES) else f"COIN{n}"
+
+
+def synthetic_markets(count: int) -> List[Dict[str, Any]]:
+    """
+    Unified markets of `count` USDT perpetuals, each with a raw instrument entry like Bybit's v5 instruments-info.
+    """
+    markets = []
+    for n in range(count):
+        base = base_currency(n)
+        market_id = f"{base}USDT"
+        info = {
+            'symbol': market_id, 'contractType': 'LinearPerpetual', 'status': 'Trading', 'baseCoin': base,
+            'quoteCoin': 'USDT', 'launchTime': '1585526400000', 'deliveryTime': '0', 'deliveryFeeRate': '',
+            'priceScale': '2', 'unifiedMarginTrade': True, 'fundingInterval': 480, 'settleCoin': 'USDT',
+            'leverageFilter': {'minLeverage': '1', 'maxLeverage': '100.00', 'leverageStep': '0.01'},
+            'priceFilter': {'minPrice': '0.10', 'maxPrice': '199999.80', 'tickSize': '0.10'},
+            'lotSizeFilter': {'maxOrderQty': '100.000', 'minOrderQty': '0.001', 'qtyStep': '0.001', 'postOnlyMaxOrderQty': '1000.000'},
+        }
+        markets.append({
+            'id': market_id, 'symbol': f"{base}/USDT:USDT", 'base': base, 'quote': 'USDT', 'settle': 'USDT',
+            'baseId': base, 'quoteId': 'USDT', 'settleId': 'USDT', 'type': 'swap', 'spot': False, 'margin': False,
+            'swap': True, 'future': False, 'option': False, 'active': True, 'contract': True, 'linear': True,
+            'inverse': False, 'taker': 0.0006, 'maker': 0.0001, 'contractSize': 1.0, 'expiry': None,
+            'expiryDatetime': None, 'strike': None, 'optionType': None,
+            'precision': {'amount': 0.001, 'price': 0.1},
+            'limits': {
+                'leverage': {'min': 1.0, 'max': 100.0},
+                'amount': {'min': 0.001, 'max': 100.0},
+                'price': {'min': 0.1, 'max': 199999.8},
+                'cost': {'min': None, 'max': None},
+            },
+            'info': info,
+        })
+    return markets
+
+
+def synthetic_balance(exchange, coins: int) -> Dict[str, Any]:
+    """
+    A fetch_balance result of a unified account holding `coins` coins, with the raw response under 'info'.
+    """
+    raw_coins = []
+    result: Dict[str, Any] = {}
+    for n in range(coins):
+        code = 'USDT' if n == 0 else base_currency(n - 1)
+        amount = 10000.0 / (n + 1)
+        raw_coins.append({
+            'coin': code, 'equity': str(amount), 'usdValue': str(amount), 'walletBalance': str(amount),
+            'availableToWithdraw': str(amount), 'availableToBorrow': '', 'borrowAmount': '0', 'accruedInterest': '0',
+            'totalOrderIM': '0', 'totalPositionIM': '0', 'totalPositionMM': '0', 'unrealisedPnl': '0',
+            'cumRealisedPnl': '0', 'bonus': '0', 'collateralSwitch': True, 'marginCollateral': True, 'locked': '0',
+        })
+        result[code] = {'free': amount, 'used': 0.0, 'total': amount, 'debt': 0.0}
+    result['info'] = {
+        'retCode': 0, 'retMsg': 'OK', 'time': 1700000000000, 'retExtInfo': {},
+        'result': {'list': [{'accountType': 'UNIFIED', 'totalEquity': '10000', 'accountIMRate': '0', 'accountMMRate': '0',
+                             'totalMarginBalance': '10000', 'totalAvailableBalance': '10000', 'coin': raw_coins}]},
+    }
+    return exchange.safe_balance(result)
+
+
+class LegacyClient:
+    """
+    Per-subaccount state as the baseline TradingClient kept it.
+
+    :param pairs: Pairs the subaccount trades.
+    :param coins: Coins held in the synthetic balance.
+    :param resources: Resources the session and markets are shared through, None to load the markets on the
+        client's own instance, as the baseline's first fetch_balance did.
+    """
+
+    def __init__(self, pairs: List[str], coins: int, resources: Optional[ExchangeResources]):
+        self.pairs_supported = pairs
+        config = {
+            'apiKey': CREDENTIALS['apiKey'],
+            'secret': CREDENTIALS['secret'],
+            'enableRateLimit': True,
+            'options': {'defaultType': CREDENTIALS['market_type'], 'adjustForTimeDifference': False, 'tpslMode': 'Partial'},
+        }
+        if resources is not None:
+            config['session'] = resources.session
+        self.exchange = ccxt.bybit(config)
+        self.exchange.options['enableUnifiedAccount'] = True
+        self.exchange.options['enableUnifiedMargin'] = True
+
+        self.balance = synthetic_balance(self.exchange, coins)
+        self.last_position_opened = {pair: 0.0 for pair in pairs}
+        self.init_position_contracts = {pair: 0.0 for pair in pairs}
+
+        if resources is None:
+            self.exchange.set_markets(self.exchange.fetch_markets())
+            markets = self.exchange.markets
+        else:
+            resources.throttle(self.exchange)
+            markets = resources.load_markets(self.exchange)
+        self.precision = {pair: len(str(markets[pair]['precision']['amount']).split('.')[1]) for pair in pairs}
+
+
+def lean_client(subaccount: str, pairs: List[str], coins: int, resources: ExchangeResources) -> TradingClient:
+    """
+    Build a TradingClient the way its constructor does, minus the credentials file and startup requests.
+    """
+    client = TradingClient.__new__(TradingClient)
+    client.exchange_id = 'bybit'
+    client.subaccount = subaccount
+    client.pairs_supported = pairs
+    client.currencies = traded_currencies(pairs)
+    client.resources = resources
+    client.create_exchange(CREDENTIALS, test_mode=False)
+    resources.throttle(client.exchange)
+    client.breaker = CircuitBreaker(f"bybit:{subaccount}", failure_types=SUBACCOUNT_FAILURES)
+    client.endpoint_breaker = get_breaker(exchange_host(client.exchange), failure_types=(ccxt.NetworkError,))
+    client.balance = client.prune_balance(synthetic_balance(client.exchange, coins))
+    client.pairs = {pair: PairState() for pair in pairs}
+    client.are_pairs_supported_and_set_precision()
+    client.init_order_pipeline()
+    return client
+
+
+def order_executors(client) -> List[Executor]:
+    """
+    Executors an order of the client runs on: none for the baseline, the process-wide ones otherwise.
+    """
+    if isinstance(client, LegacyClient):
+        return []
+    return [trading_clients._bookkeeping_executor]
+
+
+def run_order_tasks(client) -> None:
+    """
+    Submit one task per pipeline stage of an order, so the client's executors start the threads an order does.
+    """
+    for executor in order_executors(client):
+        executor.submit(lambda: None).result()
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Resident set size of the process, None where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def traced_bytes() -> int:
+    return tracemalloc.get_traced_memory()[0]
+
+
+def grown_bytes(build: Callable[[int], Any], first: int, last: int, keep: list, memory: Callable[[], int]) -> int:
+    """
+    Growth of `memory` after building clients `first` to `last - 1` and running one order's tasks on each.
+    The clients are kept alive in `keep`.
+    """
+    gc.collect()
+    start = memory()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(first, last):
+            client = build(n)
+            run_order_tasks(client)
+            keep.append(client)
+    gc.collect()
+    return memory() - start
+
+
+def measure(build: Callable[[int], Any], subaccounts: int, memory: Callable[[], int]) -> Dict[str, float]:
+    """
+    Memory of the first client, which also pays for whatever its layout shares, and of each further one,
+    and the worker threads the clients started.
+    """
+    clients: list = []
+    threads = threading.active_count()
+    first = grown_bytes(build, 0, 1, clients, memory)
+    further = grown_bytes(build, 1, subaccounts, clients, memory)
+    threads = threading.active_count() - threads
+    return {'first': first, 'further': further / max(subaccounts - 1, 1), 'per_subaccount': (first + further) / subaccounts,
+            'threads': threads}
+
+
+def measure_in_child(layout: str, metric: str) -> Dict[str, float]:
+    """
+    Measure one layout in a fresh interpreter, so memory freed by another layout is not reused and
+    tracemalloc's own bookkeeping does not count towards RSS.
+    """
+    command = [sys.executable, os.path.abspath(__file__), *sys.argv[1:], '--layout', layout, '--metric', metric]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subaccounts', type=int, default=100, help='clients built per layout')
+    parser.add_argument('--markets', type=int, default=500, help='markets listed by the exchange')
+    parser.add_argument('--coins', type=int, default=10, help='coins held by every subaccount')
+    parser.add_argument('--pairs', type=int, default=3, help='pairs traded by every subaccount')
+    parser.add_argument('--layout', help=argparse.SUPPRESS)
+    parser.add_argument('--metric', choices=('traced', 'rss'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    configure_logging(level='WARNING')
+
+    pairs = [f"{base_currency(n)}/USDT:USDT" for n in range(args.pairs)]
+    # Market loading is served from the synthetic catalog instead of the exchange
+    ccxt.bybit.fetch_markets = lambda exchange, params={}: synthetic_markets(args.markets)
+    # Build one instance first so ccxt's per-class setup is not counted
+    ccxt.bybit()
+
+    resources = ExchangeResources()
+    layouts = {
+        'baseline': lambda n: LegacyClient(pairs, args.coins, None),
+        'shared markets': lambda n: LegacyClient(pairs, args.coins, resources),
+        'lean': lambda n: lean_client(f"sub{n}", pairs, args.coins, resources),
+    }
+    if args.layout:
+        if args.metric == 'traced':
+            tracemalloc.start()
+        print(json.dumps(measure(layouts[args.layout], args.subaccounts, traced_bytes if args.metric == 'traced' else rss_bytes)))
+        return
+
+    print(f"{args.subaccounts} subaccounts, {args.markets} markets, {args.coins} coins held, {args.pairs} pairs traded")
+    print(f"{'layout':<16}{'first client':>14}{'each further':>14}{'per subaccount':>16}{'RSS each further':>18}{'threads':>9}")
+    results = {}
+    for name in layouts:
+        results[name] = measure_in_child(name, 'traced')
+        rss = f"{measure_in_child(name, 'rss')['further'] / 1024:.1f} KiB" if rss_bytes() is not None else 'n/a'
+        print(f"{name:<16}{results[name]['first'] / 1024:>10.1f} KiB{results[name]['further'] / 1024:>10.1f} KiB"
+              f"{results[name]['per_subaccount']:>12,.0f} B{rss:>18}{results[name]['threads']:>9}")
+    for name in ('baseline', 'shared markets'):
+        print(f"lean vs {name}: {results[name]['further'] / results['lean']['further']:.1f}x less per further subaccount")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# @version 0.3.10
+"""
+@title Uniswap-V2 compatible factory
+@notice Deploys one pair per token couple as a minimal proxy of the pair implementation.
+"""
+
+interface Pair:
+    def initialize(_token0: address, _token1: address): nonpayable
+
+event PairCreated:
+    token0: indexed(address)
+    token1: indexed(address)
+    pair: address
+    count: uint256
+
+pairImplementation: public(address)
+getPair: public(HashMap[address, HashMap[address, address]])
+allPairs: public(HashMap[uint256, address])
+allPairsLength: public(uint256)
+
+
+@external
+def __init__(_pair_implementation: address):
+    self.pairImplementation = _pair_implementation
+
+
+@external
+def createPair(tokenA: address, tokenB: address) -> address:
+    assert tokenA != tokenB, "IDENTICAL_ADDRESSES"
+    token0: address = tokenA
+    token1: address = tokenB
+    if convert(tokenB, uint256) < convert(tokenA, uint256):
+        token0 = tokenB
+        token1 = tokenA
+    assert token0 != empty(address), "ZERO_ADDRESS"
+    assert self.getPair[token0][token1] == empty(address), "PAIR_EXISTS"
+
+    pair: address = create_minimal_proxy_to(self.pairImplementation, salt=keccak256(concat(convert(token0, bytes20), convert(token1, bytes20))))
+    Pair(pair).initialize(token0, token1)
+
+    self.getPair[token0][token1] = pair
+    self.getPair[token1][token0] = pair
+    self.allPairs[self.allPairsLength] = pair
+    self.allPairsLength += 1
+    log PairCreated(token0, token1, pair, self.allPairsLength)
+    return pair
@@ -0,0 +1,115 @@
+# @version 0.3.10
+"""
+@title Uniswap-V2 compatible pair
+@notice Constant-product pool with the V2 0.3% fee and invariant check. Liquidity is minted but
+        cannot be burned, and flash swaps are not supported: the benchmarks only add liquidity and swap.
+"""
+from vyper.interfaces import ERC20
+
+MINIMUM_LIQUIDITY: constant(uint256) = 1000
+
+event Mint:
+    sender: indexed(address)
+    amount0: uint256
+    amount1: uint256
+
+event Swap:
+    sender: indexed(address)
+    amount0In: uint256
+    amount1In: uint256
+    amount0Out: uint256
+    amount1Out: uint256
+    to: indexed(address)
+
+event Sync:
+    reserve0: uint256
+    reserve1: uint256
+
+factory: public(address)
+token0: public(address)
+token1: public(address)
+reserve0: uint256
+reserve1: uint256
+blockTimestampLast: uint256
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+
+
+@external
+def initialize(_token0: address, _token1: address):
+    assert self.factory == empty(address), "ALREADY_INITIALIZED"
+    self.factory = msg.sender
+    self.token0 = _token0
+    self.token1 = _token1
+
+
+@view
+@external
+def getReserves() -> (uint256, uint256, uint256):
+    return self.reserve0, self.reserve1, self.blockTimestampLast
+
+
+@internal
+def _update(balance0: uint256, balance1: uint256):
+    self.reserve0 = balance0
+    self.reserve1 = balance1
+    self.blockTimestampLast = block.timestamp
+    log Sync(balance0, balance1)
+
+
+@external
+@nonreentrant("lock")
+def mint(to: address) -> uint256:
+    balance0: uint256 = ERC20(self.token0).balanceOf(self)
+    balance1: uint256 = ERC20(self.token1).balanceOf(self)
+    amount0: uint256 = balance0 - self.reserve0
+    amount1: uint256 = balance1 - self.reserve1
+
+    liquidity: uint256 = 0
+    total_supply: uint256 = self.totalSupply
+    if total_supply == 0:
+        liquidity = isqrt(amount0 * amount1) - MINIMUM_LIQUIDITY
+        # Locked forever, as in V2, so the pool can never be fully drained
+        self.balanceOf[empty(address)] = MINIMUM_LIQUIDITY
+        total_supply = MINIMUM_LIQUIDITY
+    else:
+        liquidity = min(amount0 * total_supply / self.reserve0, amount1 * total_supply / self.reserve1)
+    assert liquidity > 0, "INSUFFICIENT_LIQUIDITY_MINTED"
+
+    self.totalSupply = total_supply + liquidity
+    self.balanceOf[to] += liquidity
+    self._update(balance0, balance1)
+    log Mint(msg.sender, amount0, amount1)
+    return liquidity
+
+
+@external
+@nonreentrant("lock")
+def swap(amount0Out: uint256, amount1Out: uint256, to: address):
+    assert amount0Out > 0 or amount1Out > 0, "INSUFFICIENT_OUTPUT_AMOUNT"
+    reserve0: uint256 = self.reserve0
+    reserve1: uint256 = self.reserve1
+    assert amount0Out < reserve0 and amount1Out < reserve1, "INSUFFICIENT_LIQUIDITY"
+    assert to != self.token0 and to != self.token1, "INVALID_TO"
+
+    if amount0Out > 0:
+        assert ERC20(self.token0).transfer(to, amount0Out)
+    if amount1Out > 0:
+        assert ERC20(self.token1).transfer(to, amount1Out)
+    balance0: uint256 = ERC20(self.token0).balanceOf(self)
+    balance1: uint256 = ERC20(self.token1).balanceOf(self)
+
+    amount0In: uint256 = 0
+    amount1In: uint256 = 0
+    if balance0 > reserve0 - amount0Out:
+        amount0In = balance0 - (reserve0 - amount0Out)
+    if balance1 > reserve1 - amount1Out:
+        amount1In = balance1 - (reserve1 - amount1Out)
+    assert amount0In > 0 or amount1In > 0, "INSUFFICIENT_INPUT_AMOUNT"
+
+    balance0_adjusted: uint256 = balance0 * 1000 - amount0In * 3
+    balance1_adjusted: uint256 = balance1 * 1000 - amount1In * 3
+    assert balance0_adjusted * balance1_adjusted >= reserve0 * reserve1 * 1000 ** 2, "K"
+
+    self._update(balance0, balance1)
+    log Swap(msg.sender, amount0In, amount1In, amount0Out, amount1Out, to)
@@ -0,0 +1,124 @@
+# @version 0.3.10
+"""
+@title Uniswap-V2 compatible router
+@notice The subset of UniswapV2Router02 used by DexTradingClient and the benchmarks, with the same
+        signatures and amount math: getAmountsOut, swapExactTokensForTokens and addLiquidity.
+"""
+from vyper.interfaces import ERC20
+
+MAX_HOPS: constant(uint256) = 4
+
+interface Factory:
+    def getPair(tokenA: address, tokenB: address) -> address: view
+    def createPair(tokenA: address, tokenB: address) -> address: nonpayable
+
+interface Pair:
+    def getReserves() -> (uint256, uint256, uint256): view
+    def mint(to: address) -> uint256: nonpayable
+    def swap(amount0Out: uint256, amount1Out: uint256, to: address): nonpayable
+
+factory: public(address)
+
+
+@external
+def __init__(_factory: address):
+    self.factory = _factory
+
+
+@pure
+@internal
+def _get_amount_out(amount_in: uint256, reserve_in: uint256, reserve_out: uint256) -> uint256:
+    assert amount_in > 0, "INSUFFICIENT_INPUT_AMOUNT"
+    assert reserve_in > 0 and reserve_out > 0, "INSUFFICIENT_LIQUIDITY"
+    amount_in_with_fee: uint256 = amount_in * 997
+    return amount_in_with_fee * reserve_out / (reserve_in * 1000 + amount_in_with_fee)
+
+
+@view
+@internal
+def _reserves(token_a: address, token_b: address) -> (address, uint256, uint256):
+    pair: address = Factory(self.factory).getPair(token_a, token_b)
+    assert pair != empty(address), "PAIR_NOT_FOUND"
+    reserve0: uint256 = 0
+    reserve1: uint256 = 0
+    timestamp: uint256 = 0
+    reserve0, reserve1, timestamp = Pair(pair).getReserves()
+    if convert(token_a, uint256) < convert(token_b, uint256):
+        return pair, reserve0, reserve1
+    return pair, reserve1, reserve0
+
+
+@view
+@internal
+def _get_amounts_out(amount_in: uint256, path: DynArray[address, MAX_HOPS]) -> DynArray[uint256, MAX_HOPS]:
+    assert len(path) >= 2, "INVALID_PATH"
+    amounts: DynArray[uint256, MAX_HOPS] = [amount_in]
+    for i in range(MAX_HOPS - 1):
+        if i >= len(path) - 1:
+            break
+        pair: address = empty(address)
+        reserve_in: uint256 = 0
+        reserve_out: uint256 = 0
+        pair, reserve_in, reserve_out = self._reserves(path[i], path[i + 1])
+        amounts.append(self._get_amount_out(amounts[i], reserve_in, reserve_out))
+    return amounts
+
+
+@view
+@external
+def getAmountsOut(amountIn: uint256, path: DynArray[address, MAX_HOPS]) -> DynArray[uint256, MAX_HOPS]:
+    return self._get_amounts_out(amountIn, path)
+
+
+@external
+def addLiquidity(tokenA: address, tokenB: address, amountADesired: uint256, amountBDesired: uint256,
+                 amountAMin: uint256, amountBMin: uint256, to: address, deadline: uint256) -> (uint256, uint256, uint256):
+    assert block.timestamp <= deadline, "EXPIRED"
+    pair: address = Factory(self.factory).getPair(tokenA, tokenB)
+    if pair == empty(address):
+        pair = Factory(self.factory).createPair(tokenA, tokenB)
+
+    amount_a: uint256 = amountADesired
+    amount_b: uint256 = amountBDesired
+    reserve_a: uint256 = 0
+    reserve_b: uint256 = 0
+    pair, reserve_a, reserve_b = self._reserves(tokenA, tokenB)
+    if reserve_a != 0 or reserve_b != 0:
+        # Keep the pool price: deposit the desired amount of one token and the matching amount of the other
+        amount_b_optimal: uint256 = amountADesired * reserve_b / reserve_a
+        if amount_b_optimal <= amountBDesired:
+            amount_b = amount_b_optimal
+        else:
+            amount_a = amountBDesired * reserve_a / reserve_b
+    assert amount_a >= amountAMin, "INSUFFICIENT_A_AMOUNT"
+    assert amount_b >= amountBMin, "INSUFFICIENT_B_AMOUNT"
+
+    assert ERC20(tokenA).transferFrom(msg.sender, pair, amount_a)
+    assert ERC20(tokenB).transferFrom(msg.sender, pair, amount_b)
+    return amount_a, amount_b, Pair(pair).mint(to)
+
+
+@external
+def swapExactTokensForTokens(amountIn: uint256, amountOutMin: uint256, path: DynArray[address, MAX_HOPS],
+                             to: address, deadline: uint256) -> DynArray[uint256, MAX_HOPS]:
+    assert block.timestamp <= deadline, "EXPIRED"
+    amounts: DynArray[uint256, MAX_HOPS] = self._get_amounts_out(amountIn, path)
+    assert amounts[len(amounts) - 1] >= amountOutMin, "INSUFFICIENT_OUTPUT_AMOUNT"
+
+    pair: address = Factory(self.factory).getPair(path[0], path[1])
+    assert ERC20(path[0]).transferFrom(msg.sender, pair, amountIn)
+    for i in range(MAX_HOPS - 1):
+        if i >= len(path) - 1:
+            break
+        # Each pair sends its output straight to the next pair of the path, the last one to the recipient
+        recipient: address = to
+        next_pair: address = empty(address)
+        if i < len(path) - 2:
+            next_pair = Factory(self.factory).getPair(path[i + 1], path[i + 2])
+            recipient = next_pair
+        if convert(path[i], uint256) < convert(path[i + 1], uint256):
+            Pair(pair).swap(0, amounts[i + 1], recipient)
+        else:
+            Pair(pair).swap(amounts[i + 1], 0, recipient)
+        pair = next_pair
+    return amounts
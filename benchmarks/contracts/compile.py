@@ -0,0 +1,34 @@
+"""
+Compile the local-chain benchmark contracts into build/<Name>.json (ABI and bytecode).
+
+The artifacts are committed, so the benchmarks run without a compiler. Only needed after editing a
+contract, with vyper==0.3.10 installed.
+
+Usage: python benchmarks/contracts/compile.py
+"""
+import json
+import os
+
+import vyper
+from vyper.compiler.settings import Settings
+
+CONTRACTS = ('Token', 'UniswapV2Pair', 'UniswapV2Factory', 'UniswapV2Router')
+
+# py-evm, behind eth-tester, implements the London fork
+EVM_VERSION = 'london'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    os.makedirs(os.path.join(HERE, 'build'), exist_ok=True)
+    for name in CONTRACTS:
+        with open(os.path.join(HERE, f"{name}.vy"), 'r') as file:
+            output = vyper.compile_code(file.read(), ['abi', 'bytecode'], settings=Settings(evm_version=EVM_VERSION))
+        with open(os.path.join(HERE, 'build', f"{name}.json"), 'w') as file:
+            json.dump({'abi': output['abi'], 'bytecode': output['bytecode']}, file)
+        print(f"{name}: {len(output['bytecode']) // 2 - 1} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Benchmarks run as scripts from the repository root or the benchmarks folder
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from eth_account import Account
+from eth_tester import EthereumTester, PyEVMBackend
+from web3 import Web3
+from web3.contract import Contract
+from web3.providers.eth_tester import EthereumTesterProvider
+
+from dex_trading_client import DexTradingClient
+from web3_providers import Web3ProviderManager, provider_manager
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contracts', 'build')
+
+# Key DexTradingClient looks the in-process chain up with, in place of an Infura URL
+LOCAL_RPC_URL = 'local-evm://benchmark'
+
+# Pools created by default, as (base, quote, price in quote per base). Every token has 18 decimals.
+DEFAULT_POOLS = (('WETH', 'DAI', 2000.0), ('WETH', 'USDT', 2000.0), ('DAI', 'USDT', 1.0))
+
+
+class RPCRecorder:
+    """
+    Innermost web3 middleware counting the JSON-RPC requests that reach the node, per method.
+
+    It can also delay every request to emulate a remote node, and serializes requests into the
+    in-process node, which is not thread-safe. Requests eth-tester's provider issues while serving
+    another one (e.g. eth_coinbase to fill a missing 'from') never go over the wire and are not counted.
+
+    :param latency: Seconds added to every request.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._node_lock = threading.RLock()
+        self._local = threading.local()
+
+    def __call__(self, make_request, web3):
+        def middleware(method, params):
+            if getattr(self._local, 'in_node', False):
+                return make_request(method, params)
+            with self._lock:
+                self.calls[method] += 1
+            if self.latency:
+                time.sleep(self.latency)
+            with self._node_lock:
+                self._local.in_node = True
+                try:
+                    return make_request(method, params)
+                finally:
+                    self._local.in_node = False
+        return middleware
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset(self) -> Counter:
+        """
+        Clear the counters.
+
+        :return: The counts collected since the previous reset.
+        """
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+
+def load_artifact(name: str) -> dict:
+    """
+    Load the compiled ABI and bytecode of a benchmark contract (see contracts/compile.py).
+    """
+    with open(os.path.join(BUILD_DIR, f"{name}.json"), 'r') as file:
+        return json.load(file)
+
+
+class LocalChain:
+    """
+    In-process EVM (eth-tester on py-evm) with ERC-20 tokens and Uniswap-V2 compatible pools, for
+    running DexTradingClient without Infura or mainnet.
+
+    :param rpc_latency: Seconds added to every JSON-RPC request, 0 for an in-process node.
+    :param providers: Provider registry the chain is registered in, under LOCAL_RPC_URL.
+    """
+
+    def __init__(self, rpc_latency: float = 0.0, providers: Web3ProviderManager = provider_manager):
+        self.web3 = Web3(EthereumTesterProvider(EthereumTester(PyEVMBackend())))
+        self.rpc = RPCRecorder(rpc_latency)
+        self.web3.middleware_onion.inject(self.rpc, 'rpc_recorder', layer=0)
+        self.deployer = self.web3.eth.accounts[0]
+        self.tokens: Dict[str, Contract] = {}
+        self._wallets = 0
+        providers.register(LOCAL_RPC_URL, self.web3)
+
+        pair_implementation = self.deploy('UniswapV2Pair')
+        self.factory = self.deploy('UniswapV2Factory', pair_implementation.address)
+        self.router = self.deploy('UniswapV2Router', self.factory.address)
+
+    def transact(self, function, sender: Optional[str] = None) -> dict:
+        txn_hash = function.transact({'from': sender or self.deployer})
+        return self.web3.eth.wait_for_transaction_receipt(txn_hash)
+
+    def deploy(self, name: str, *args) -> Contract:
+        """
+        Deploy a compiled benchmark contract from the deployer account.
+        """
+        artifact = load_artifact(name)
+        receipt = self.transact(self.web3.eth.contract(abi=artifact['abi'], bytecode=artifact['bytecode']).constructor(*args))
+        return self.web3.eth.contract(address=receipt['contractAddress'], abi=artifact['abi'])
+
+    def token(self, symbol: str) -> Contract:
+        """
+        Return the token with the given symbol, deploying it on first use.
+        """
+        if symbol not in self.tokens:
+            self.tokens[symbol] = self.deploy('Token', symbol, symbol, 18)
+        return self.tokens[symbol]
+
+    def add_pool(self, base: str, quote: str, price: float, base_liquidity: float = 10_000.0) -> str:
+        """
+        Create the base/quote pool at the given price and fund it from the deployer.
+
+        :param base: Base token symbol.
+        :param quote: Quote token symbol.
+        :param price: Quote tokens per base token.
+        :param base_liquidity: Base tokens deposited, matched by `base_liquidity * price` quote tokens.
+        :return: Address of the pair.
+        """
+        base_token, quote_token = self.token(base), self.token(quote)
+        base_amount = Web3.toWei(base_liquidity, 'ether')
+        quote_amount = Web3.toWei(base_liquidity * price, 'ether')
+        for token, amount in ((base_token, base_amount), (quote_token, quote_amount)):
+            self.transact(token.functions.mint(self.deployer, amount))
+            self.transact(token.functions.approve(self.router.address, amount))
+        deadline = self.web3.eth.get_block('latest')['timestamp'] + 600
+        self.transact(self.router.functions.addLiquidity(base_token.address, quote_token.address, base_amount, quote_amount,
+                                                         0, 0, self.deployer, deadline))
+        return self.factory.functions.getPair(base_token.address, quote_token.address).call()
+
+    def create_wallet(self, balances: Dict[str, float], eth: float = 10.0) -> Tuple[str, str]:
+        """
+        Create a wallet holding ETH for gas and the given token balances.
+
+        :param balances: Token symbol mapped to the amount minted to the wallet.
+        :param eth: ETH sent to the wallet.
+        :return: The wallet address and private key.
+        """
+        self._wallets += 1
+        account = Account.from_key(Web3.keccak(text=f"aion-benchmark-wallet-{self._wallets}"))
+        self.web3.eth.wait_for_transaction_receipt(self.web3.eth.send_transaction({
+            'from': self.deployer, 'to': account.address, 'value': Web3.toWei(eth, 'ether'),
+        }))
+        for symbol, amount in balances.items():
+            self.transact(self.token(symbol).functions.mint(account.address, Web3.toWei(amount, 'ether')))
+        return account.address, account.key.hex()
+
+    def client_data(self, client_name: str, public_key: str, private_key: str) -> dict:
+        """
+        Build a dex_credentials.json entry pointing at this chain.
+        """
+        return {
+            'client_name': client_name,
+            'public_key': public_key,
+            'private_key': private_key,
+            'infura_url': LOCAL_RPC_URL,
+            'router_address': self.router.address,
+            # A throwaway chain, approving once keeps approvals out of the swap numbers
+            'unlimited_approval': True,
+            'dex': ['uniswap'],
+            'tokens': {symbol: {'contract_address': token.address} for symbol, token in self.tokens.items()},
+        }
+
+    def create_client(self, client_name: str, balances: Dict[str, float]) -> DexTradingClient:
+        """
+        Create a funded wallet and a DexTradingClient trading from it on this chain.
+
+        DexTradingClient loads the token ABIs from ABI/tokens, so it is built from the repository root.
+        """
+        public_key, private_key = self.create_wallet(balances)
+        cwd = os.getcwd()
+        os.chdir(REPO_ROOT)
+        try:
+            return DexTradingClient(self.client_data(client_name, public_key, private_key))
+        finally:
+            os.chdir(cwd)
+
+
+def create_chain(rpc_latency: float = 0.0, pools=DEFAULT_POOLS) -> LocalChain:
+    """
+    Start a local chain with the default tokens and pools.
+    """
+    chain = LocalChain(rpc_latency=rpc_latency)
+    for base, quote, price in pools:
+        chain.add_pool(base, quote, price)
+    return chain
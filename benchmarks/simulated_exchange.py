@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Benchmarks run as scripts from the repository root or the benchmarks folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock_sync import ClockMonitor
+from resilience import CircuitBreaker
+from trading_clients import SUBACCOUNT_FAILURES, PairState, TradingClient, traded_currencies
+
+# Round trip of each simulated endpoint, in seconds
+DEFAULT_LATENCY = {
+    'fetch_ticker': 0.08,
+    'cancel_all_unified_account_orders': 0.12,
+    'create_order': 0.10,
+    'fetch_position': 0.08,
+    'fetch_balance': 0.09,
+    'fetch_open_orders': 0.10,
+    'fetch_orders': 0.10,
+}
+
+
+class SimulatedExchange:
+    """
+    Stand-in for a ccxt exchange that answers from memory after a fixed per-endpoint latency.
+
+    :param latency: Round trip per method name, in seconds.
+    :param price: Last price returned by the ticker.
+    :param free_balance: Free USDT balance.
+    """
+
+    has = {'fetchOrders': True}
+    options: Dict[str, Any] = {}
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, price: float = 30000.0, free_balance: float = 10000.0):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.price = price
+        self.free_balance = free_balance
+        self.position_size = 0.0
+        # Orders resting on the exchange, by ID, as returned to order queries
+        self.resting: Dict[str, Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._next_order_id = 0
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        time.sleep(self.latency.get(method, 0.0))
+
+    def milliseconds(self) -> int:
+        return int(time.time() * 1000)
+
+    def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        self._call('fetch_ticker')
+        return {'symbol': symbol, 'last': self.price}
+
+    def cancel_all_unified_account_orders(self, symbol: str) -> List[Dict[str, Any]]:
+        self._call('cancel_all_unified_account_orders')
+        with self._lock:
+            cancelled = [order for order in self.resting.values() if order['symbol'] == symbol]
+            for order in cancelled:
+                del self.resting[order['id']]
+        return [dict(order, status='canceled') for order in cancelled]
+
+    def create_order(self, symbol: str, order_type: str, side: str, amount: float, price: Optional[float] = None, params: Optional[dict] = None) -> Dict[str, Any]:
+        self._call('create_order')
+        params = params or {}
+        conditional = any(key in params for key in ('stopPrice', 'triggerPrice', 'stopLossPrice', 'takeProfitPrice'))
+        with self._lock:
+            self._next_order_id += 1
+            order_id = str(self._next_order_id)
+            order = {'id': order_id, 'symbol': symbol, 'type': order_type, 'side': side, 'amount': amount,
+                     'timestamp': self.milliseconds(), 'conditional': conditional}
+            if order_type == 'market' and not conditional:
+                self.position_size += amount if side == 'buy' else -amount
+                return dict(order, status='closed')
+            self.resting[order_id] = dict(order, status='open')
+        # Like Bybit, the acknowledgement carries the ID but no status
+        return {'id': order_id, 'symbol': symbol}
+
+    def fetch_position(self, symbol: str) -> Dict[str, Any]:
+        self._call('fetch_position')
+        return {'symbol': symbol, 'info': {'size': str(abs(self.position_size))}}
+
+    def fetch_balance(self, params: Optional[dict] = None) -> Dict[str, Any]:
+        self._call('fetch_balance')
+        return {'USDT': {'free': self.free_balance, 'used': 0.0, 'total': self.free_balance}}
+
+    def _query(self, symbol: Optional[str], since: Optional[int], limit: Optional[int], params: Optional[dict]) -> List[Dict[str, Any]]:
+        # Like Bybit, conditional orders are only returned when asked for with 'stop'
+        conditional = bool((params or {}).get('stop'))
+        with self._lock:
+            orders = [dict(order) for order in self.resting.values()
+                      if order['conditional'] == conditional and symbol in (None, order['symbol'])
+                      and (since is None or order['timestamp'] >= since)]
+        return orders[:limit]
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None, limit: Optional[int] = None, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        self._call('fetch_open_orders')
+        return self._query(symbol, since, limit, params)
+
+    def fetch_orders(self, symbol: Optional[str] = None, since: Optional[int] = None, limit: Optional[int] = None, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        self._call('fetch_orders')
+        return self._query(symbol, since, limit, params)
+
+
+def build_client(exchange: SimulatedExchange, symbol: str = 'BTC/USDT:USDT', subaccount: str = 'bench') -> TradingClient:
+    """
+    Build a TradingClient around a simulated exchange, skipping the credential file and startup requests.
+    """
+    client = TradingClient.__new__(TradingClient)
+    client.exchange_id = 'bybit'
+    client.subaccount = subaccount
+    client.pairs_supported = [symbol]
+    client.currencies = traded_currencies(client.pairs_supported)
+    client.exchange = exchange
+    client.balance = {'USDT': {'free': exchange.free_balance, 'used': 0.0, 'total': exchange.free_balance}}
+    client.pairs = {symbol: PairState()}
+    client.pairs[symbol].amount_decimals = 3
+    client.pairs[symbol].amount_step = 0.001
+    client.pairs[symbol].min_amount = 0.001
+    client.pairs[symbol].min_cost = 5.0
+    client.clock = ClockMonitor('simulated')
+    client.breaker = CircuitBreaker(f"bybit:{subaccount}", failure_types=SUBACCOUNT_FAILURES)
+    client.endpoint_breaker = CircuitBreaker('simulated')
+    client.init_order_pipeline()
+    # A resting take-profit from the previous trade, so opening orders have something to cancel
+    client.order_book.replace([{'id': 'tp', 'symbol': symbol, 'status': 'open', 'timestamp': exchange.milliseconds()}])
+    return client
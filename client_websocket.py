@@ -6,8 +6,12 @@ import requests
 import socketio
 import trading_clients as tc
 import dex_trading_client as dextc
-import time
-from typing import Any, Dict
+import position_sizing as ps
+from structured_logging import get_logger
+from alerts import Alert, json_codec
+from profiling import alert_profiler, install_signal_handlers
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Optional
 import json
 
 # Define terminal colors for visual cues
@@ -16,24 +20,157 @@ RED = '\033[91m'
 YELLOW = '\033[93m'
 END_COLOR = '\033[0m'
 
-sio = socketio.Client()
+sio = socketio.Client(json=json_codec)
 BASE_URL = 'http://localhost:5000'
 
-def login(username: str, password: str) -> None:
+log = get_logger('websocket')
+
+# Orders of different subaccounts are sent in parallel so a slow account does not delay the others
+dispatch_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='dispatch')
+
+def authenticate(username: str, password: str) -> Optional[str]:
     """
-    Authenticate and establish a connection to the server.
+    Log in to the server.
 
     :param username: User's identification string.
     :param password: User's password string.
+    :return: The user_id whose room receives the user's alerts, or None if the login failed.
     """
     response = requests.post(f'{BASE_URL}/login_for_websocket', json={'username': username, 'password': password})
     if response.status_code == 200:
-        user_id = response.json()['user_id']
+        return response.json()['user_id']
+    return None
+
+def login(username: str, password: str) -> None:
+    """
+    Authenticate and establish a connection to the server.
+
+    :param username: User's identification string.
+    :param password: User's password string.
+    """
+    user_id = authenticate(username, password)
+    if user_id is not None:
         print(YELLOW + 'Login successful. user_id:' + END_COLOR, user_id)
         connect_to_socket(user_id)  # Connect to the socket with the received user ID
     else:
         print(RED + 'Login failed. Invalid username or password.' + END_COLOR)
 
+def dispatch_cex_alert(alert: Alert, exchange_clients: Dict[str, tc.TradingClient]) -> None:
+    """
+    Size and send one alert's orders for every subaccount of an exchange, all subaccounts concurrently.
+
+    Subaccounts whose circuit breaker is open are skipped, and a failing subaccount only logs its own error.
+
+    :param alert: The validated alert.
+    :param exchange_clients: Subaccount name mapped to its client, for the alert's exchange.
+    """
+    ticker_pair = alert.symbol
+    matching_clients = []
+    for subaccount, client in exchange_clients.items():
+        if not client.supports_pair(ticker_pair):
+            continue
+        if client.breaker.is_open():
+            log.warning('circuit open, skipping subaccount', extra={'symbol': ticker_pair, 'subaccount': subaccount})
+            continue
+        matching_clients.append(client)
+
+    # Size every subaccount at once so accounts under the market minimum never hit the exchange
+    try:
+        sizing = ps.size_orders(alert, matching_clients)
+    except Exception as e:
+        log.error(f"Could not size orders for {ticker_pair}: {e}")
+        return
+
+    orders = {}
+    for client, order_n_contracts, below_minimum in sizing:
+        if below_minimum:
+            log.warning('order size below exchange minimum, skipping subaccount', extra={'symbol': ticker_pair, 'subaccount': client.subaccount, 'amount': order_n_contracts})
+            continue
+        orders[dispatch_pool.submit(client.breaker.call, client.process_order, alert, order_n_contracts)] = client
+
+    for future in as_completed(orders):
+        client = orders[future]
+        try:
+            order_info = future.result()
+        except Exception as e:
+            log.error(f"Order failed: {e}", extra={'symbol': ticker_pair, 'subaccount': client.subaccount})
+            continue
+        log.info('order processed', extra={'symbol': ticker_pair, 'subaccount': client.subaccount, 'payload': order_info})
+
+
+def dispatch_dex_alert(alert: Alert, dex_clients: Dict[str, dextc.DexTradingClient]) -> bool:
+    """
+    Send one alert's swap for every DEX account supporting its pair, all accounts concurrently.
+
+    :param alert: The validated alert.
+    :param dex_clients: Account name mapped to its DEX client.
+    :return: True if at least one account supports the pair.
+    """
+    orders = {}
+    dex_handled = False
+    for account_name, dex_client in dex_clients.items():
+        if not dex_client.supports_pair(alert.symbol):
+            continue
+        dex_handled = True
+        if dex_client.breaker.is_open():
+            log.warning('circuit open, skipping DEX account', extra={'symbol': alert.symbol, 'dex_account': account_name})
+            continue
+        orders[dispatch_pool.submit(dex_client.breaker.call, dex_client.process_order, alert)] = account_name
+
+    for future in as_completed(orders):
+        account_name = orders[future]
+        try:
+            order_info = future.result()
+        except Exception as e:
+            log.error(f"Swap failed: {e}", extra={'symbol': alert.symbol, 'dex_account': account_name})
+            continue
+        log.info('order processed', extra={'symbol': alert.symbol, 'dex_account': account_name, 'payload': order_info})
+    return dex_handled
+
+
+def handle_alerts(data: Dict[str, Any], client_type: str, clients: Dict[str, Any]) -> None:
+    """
+    Decode the alerts of a 'new_updates' event and dispatch them to one user's clients.
+
+    :param data: A dictionary containing new updates.
+    :param client_type: 'cex' or 'dex'.
+    :param clients: The user's clients, exchange to subaccount to TradingClient for CEX, account name to DexTradingClient for DEX.
+    """
+    with alert_profiler.batch():
+        for payload in data['data']:
+            with alert_profiler.alert():
+                handle_alert(payload, client_type, clients)
+
+
+def handle_alert(payload: Dict[str, Any], client_type: str, clients: Dict[str, Any]) -> None:
+    """
+    Decode one alert and dispatch it to one user's clients.
+
+    :param payload: One entry of the 'new_updates' data list.
+    :param client_type: 'cex' or 'dex'.
+    :param clients: The user's clients.
+    """
+    # Decode and validate once, every client receives the same Alert
+    try:
+        alert = Alert.from_dict(payload)
+    except ValueError as e:
+        log.error(f"Discarding invalid alert: {e}", extra={'payload': payload})
+        return
+    log.info('alert to execute', extra={'symbol': alert.symbol, 'exchange': alert.exchange, 'payload': payload})
+    ticker_pair = alert.symbol
+    exchange = alert.exchange
+
+    if client_type == 'cex':
+        if exchange in clients:
+            dispatch_cex_alert(alert, clients[exchange])
+        else:
+            log.warning(f"Received data for unsupported exchange: {exchange}")
+
+    # Handling for DEX clients
+    elif client_type == 'dex':
+        if not dispatch_dex_alert(alert, clients):
+            log.warning(f"Received data for unsupported ticker pair: {ticker_pair}")
+
 
 def connect_to_socket(user_id: str) -> None:
     """
@@ -53,37 +190,8 @@ def connect_to_socket(user_id: str) -> None:
 
         :param data: A dictionary containing new updates.
         """
-        print('______New updates received______')
-        for alert in data['data']:
-            print(YELLOW + "ALERT TO EXECUTE:" + END_COLOR)
-            print(alert)
-            ticker_pair = alert['symbol']
-            exchange = alert['exchange'].lower()
-
-            if client_type == 'cex':
-                if exchange in clients:
-                    for subaccount, client in clients[exchange].items():
-                        if client.supports_pair(ticker_pair):
-                            order_info = client.process_order(alert)
-                            print(GREEN + "ORDER INFO PROCESSED" + END_COLOR)
-                            #print(order_info)
-                            time.sleep(2)
-                else:
-                    print(RED + f"Received data for unsupported exchange: {exchange}" + END_COLOR)
-
-            # Handling for DEX clients
-            elif client_type == 'dex':
-                dex_handled = False
-                for account_name, dex_client in clients.items():
-                    if dex_client.supports_pair(ticker_pair):
-                        order_info = dex_client.process_order(alert)
-                        print(GREEN + f"ORDER INFO PROCESSED FOR DEX ACCOUNT {account_name}:" + END_COLOR)
-                        print(order_info)
-                        time.sleep(2)
-                        dex_handled = True
-
-                if not dex_handled:
-                    print(RED + f"Received data for unsupported ticker pair: {ticker_pair}" + END_COLOR)
+        log.info('new updates received', extra={'alerts': len(data['data'])})
+        handle_alerts(data, client_type, clients)
 
     @sio.on('disconnect')
     def on_disconnect() -> None:
@@ -140,26 +248,43 @@ def initialize_dex_clients(credentials):
     return chosen_clients
 
 
+def choose_clients():
+    """
+    Prompt for the client type and build the chosen clients.
+
+    :return: The client type ('cex' or 'dex') and the clients alerts are dispatched to.
+    """
+    client_type = choose_client_type()
+
+    if client_type == 'cex':
+        test_mode = tc.choose_network_mode()
+        chosen_exchanges = tc.choose_exchanges(test_mode)
+        clients = {exchange: {subaccount: tc.TradingClient(exchange, subaccount, test_mode=test_mode) for subaccount in subaccounts} for exchange, subaccounts in chosen_exchanges.items()}
+
+    elif client_type == 'dex':
+        with open('dex_credentials.json', 'r') as file:
+            dex_configurations = json.load(file)
+
+        clients = initialize_dex_clients(dex_configurations)
+
+    return client_type, clients
+
+
 def start() -> None:
-    """Start the application, prompting the user for credentials and initiating the login."""
+    """Start the application, prompting the user for clients and credentials and initiating the login."""
+    global client_type, clients
+    client_type, clients = choose_clients()
+    install_signal_handlers()
+
     print(YELLOW + "CREDENTIALS FOR WEBHOOKS:" + END_COLOR)
     username = input('Enter username: ')
     password = input('Enter password: ')
     login(username, password)
 
 
-client_type = choose_client_type()
-
-if client_type == 'cex':
-    test_mode = tc.choose_network_mode()
-    chosen_exchanges = tc.choose_exchanges(test_mode)
-    clients = {exchange: {subaccount: tc.TradingClient(exchange, subaccount, test_mode=test_mode) for subaccount in subaccounts} for exchange, subaccounts in chosen_exchanges.items()}
-
-elif client_type == 'dex':
-    with open('dex_credentials.json', 'r') as file:
-        dex_configurations = json.load(file)
-
-    clients = initialize_dex_clients(dex_configurations)
+# Set by start(), the multi-tenant runtime keeps its own per user
+client_type = None
+clients: Dict[str, Any] = {}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from structured_logging import get_logger
+
+log = get_logger('clock')
+
+
+def exchange_host(exchange) -> str:
+    """
+    Return the API host a ccxt exchange instance sends its requests to.
+
+    :param exchange: The ccxt exchange instance.
+    :return: Host name, e.g. 'api.bybit.com'.
+    """
+    api = exchange.urls['api']
+    url = api if isinstance(api, str) else next(value for value in api.values() if isinstance(value, str))
+    return urlparse(exchange.implode_hostname(url)).netloc
+
+
+class ClockMonitor:
+    """
+    Background clock-offset and round-trip tracker for one exchange host.
+
+    A smoothed server clock offset is pushed into the `timeDifference` option of every registered
+    exchange, so request timestamps are stamped locally without an extra round trip. Request
+    latencies observed on those exchanges feed an adaptive timeout derived from their distribution.
+
+    :param host: The exchange API host.
+    :param interval: Seconds between time-sync probes.
+    :param alpha: Smoothing factor of the offset and RTT moving averages.
+    :param window: Number of latency samples kept for the timeout percentile.
+    :param min_samples: Samples needed before the timeout adapts.
+    :param percentile: Latency percentile the timeout is derived from.
+    :param timeout_multiplier: Headroom applied to that percentile.
+    :param min_timeout_ms: Lower timeout bound (ccxt passes whole seconds to requests).
+    :param max_timeout_ms: Upper timeout bound, also used until enough samples are collected.
+    """
+
+    def __init__(self, host: str, interval: float = 30.0, alpha: float = 0.2, window: int = 256, min_samples: int = 20,
+                 percentile: float = 0.99, timeout_multiplier: float = 3.0, min_timeout_ms: int = 2000, max_timeout_ms: int = 30000):
+        self.host = host
+        self.interval = interval
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout_ms = min_timeout_ms
+        self.max_timeout_ms = max_timeout_ms
+        self.offset_ms: Optional[float] = None
+        self.rtt_ms: Optional[float] = None
+        self._samples = deque(maxlen=window)
+        self._exchanges = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_synced(self) -> bool:
+        return self.offset_ms is not None
+
+    def _smooth(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def timestamp(self) -> int:
+        """
+        Current server time in milliseconds, estimated from the cached offset.
+        """
+        return int(time.time() * 1000 + (self.offset_ms or 0.0))
+
+    def record_latency(self, seconds: float) -> None:
+        """
+        Add one observed request latency to the distribution.
+
+        :param seconds: Request duration.
+        """
+        with self._lock:
+            self._samples.append(seconds * 1000)
+            self.rtt_ms = self._smooth(self.rtt_ms, seconds * 1000)
+
+    def latency_percentile_ms(self, percentile: float) -> Optional[float]:
+        """
+        Observed request latency at the given percentile, or None until enough samples are collected.
+
+        :param percentile: Between 0 and 1.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[int(percentile * (len(samples) - 1))]
+
+    def adaptive_timeout_ms(self) -> int:
+        """
+        Timeout derived from the observed latency percentile, clamped to the configured bounds.
+        """
+        latency = self.latency_percentile_ms(self.percentile)
+        if latency is None:
+            return self.max_timeout_ms
+        return int(min(self.max_timeout_ms, max(self.min_timeout_ms, latency * self.timeout_multiplier)))
+
+    def _instrument(self, exchange) -> None:
+        fetch = exchange.fetch
+
+        def timed_fetch(url, method='GET', headers=None, body=None):
+            start = time.perf_counter()
+            try:
+                return fetch(url, method, headers, body)
+            finally:
+                self.record_latency(time.perf_counter() - start)
+
+        exchange.fetch = timed_fetch
+
+    def register(self, exchange) -> None:
+        """
+        Start stamping an exchange's requests with the cached offset and feeding its latencies to the monitor.
+
+        The first registration runs a synchronous probe so the offset is known before any signed request.
+
+        :param exchange: A ccxt exchange instance talking to this host.
+        """
+        self._instrument(exchange)
+        with self._lock:
+            self._exchanges.add(exchange)
+        if not self.is_synced:
+            try:
+                self.probe()
+            except Exception as e:
+                log.warning(f"Initial time sync failed for {self.host}, retrying in the background: {e}")
+        else:
+            self._apply(exchange, self.adaptive_timeout_ms())
+        self.start()
+
+    def _apply(self, exchange, timeout_ms: int) -> None:
+        # ccxt signs with milliseconds() - timeDifference, i.e. local time corrected to server time
+        exchange.options['timeDifference'] = -int(self.offset_ms or 0)
+        exchange.timeout = timeout_ms
+
+    def probe(self) -> None:
+        """
+        Measure the server clock offset once and push the new offset and timeout to every registered exchange.
+        """
+        with self._lock:
+            exchanges = list(self._exchanges)
+        if not exchanges:
+            return
+        sent = time.time() * 1000
+        server_time = exchanges[0].fetch_time()
+        received = time.time() * 1000
+        # The server stamped its clock roughly halfway through the round trip
+        offset = server_time - (sent + received) / 2
+        with self._lock:
+            self.offset_ms = self._smooth(self.offset_ms, offset)
+        timeout_ms = self.adaptive_timeout_ms()
+        for exchange in exchanges:
+            self._apply(exchange, timeout_ms)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.probe()
+            except Exception as e:
+                log.warning(f"Time sync probe failed for {self.host}: {e}")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"clock-{self.host}", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        """
+        Current offset, smoothed RTT and timeout of the host.
+        """
+        return {
+            'host': self.host,
+            'offset_ms': self.offset_ms,
+            'rtt_ms': self.rtt_ms,
+            'timeout_ms': self.adaptive_timeout_ms(),
+        }
+
+
+_monitors: Dict[str, ClockMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_clock_monitor(exchange) -> ClockMonitor:
+    """
+    Return the clock monitor shared by every exchange instance talking to the same host.
+
+    :param exchange: The ccxt exchange instance.
+    :return: The host's ClockMonitor.
+    """
+    host = exchange_host(exchange)
+    with _monitors_lock:
+        monitor = _monitors.get(host)
+        if monitor is None:
+            monitor = _monitors[host] = ClockMonitor(host)
+        return monitor
@@ -1,7 +1,18 @@
 import json
 import os
+import requests
 from web3 import Web3
-from termcolor import colored
+from web3_providers import Web3ProviderManager, provider_manager
+from structured_logging import get_logger
+from alerts import Alert, OrderType, Side
+from resilience import CircuitBreaker, get_breaker, retry_read
+
+log = get_logger('dex')
+
+# Uniswap V2 Router02 on Ethereum mainnet, used unless the client data sets 'router_address'
+UNISWAP_V2_ROUTER = '0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D'
+
+MAX_UINT256 = 2 ** 256 - 1
 
 class DexTradingClient:
     """
@@ -12,7 +23,12 @@ class DexTradingClient:
     - public_key (str): Public Ethereum address of the client.
     - private_key (str): Private key for the Ethereum address (used for signing transactions).
     - infura_url (str): URL endpoint for the Infura Ethereum node service.
+    - providers (Web3ProviderManager): Registry handing out Web3 instances shared per endpoint.
     - web3 (Web3 instance): Web3 instance to interact with the Ethereum blockchain.
+    - router_address (str): Address of the Uniswap V2 compatible router.
+    - unlimited_approval (bool): Whether the router is approved for unlimited amounts instead of each swap's exact amount.
+    - breaker (CircuitBreaker): Circuit breaker of this wallet.
+    - endpoint_breaker (CircuitBreaker): Circuit breaker shared by every client on the same RPC URL.
     - dex (str): The name or identifier of the DEX.
     - tokens (dict): Information about supported tokens.
     - token_symbols (list): List of token symbols extracted from the tokens dictionary.
@@ -20,23 +36,31 @@ class DexTradingClient:
     - token_abis (dict): ABIs for the supported tokens.
     """
 
-    def __init__(self, client_data):
+    def __init__(self, client_data, providers: Web3ProviderManager = provider_manager):
         """
         Initialize the DEX trading client with provided data.
 
         Args:
-        - client_data (dict): Data needed to initialize the client, including client name, keys, Infura URL, DEX, and tokens.
+        - client_data (dict): Data needed to initialize the client, including client name, keys, Infura URL, DEX, and tokens,
+          and optionally the router address and 'unlimited_approval' (defaults to False).
+        - providers (Web3ProviderManager, optional): Provider registry to share connections with. Defaults to the process-wide one.
         """
         self.client_name = client_data["client_name"]
         self.public_key = client_data["public_key"]
         self.private_key = client_data["private_key"]
         self.infura_url = client_data["infura_url"]
-        self.web3 = Web3(Web3.HTTPProvider(self.infura_url))
+        self.providers = providers
+        self.router_address = client_data.get("router_address", UNISWAP_V2_ROUTER)
+        self.unlimited_approval = bool(client_data.get("unlimited_approval", False))
+        self.connect()
+        self.breaker = CircuitBreaker(self.client_name)
+        self.endpoint_breaker = get_breaker(self.infura_url, failure_types=(requests.exceptions.RequestException,))
         self.dex = client_data["dex"]
         self.tokens = client_data["tokens"]
         self.token_symbols = list(self.tokens.keys())
         self.supported_pairs = self.generate_supported_pairs(self.tokens)
         self.token_abis = self.load_token_abis(self.token_symbols)
+        self.token_by_address = {data['contract_address']: token_symbol for token_symbol, data in self.tokens.items()}
 
         for token_symbol, data in self.tokens.items():
             self.validate_token_address_with_abi(token_symbol, data['contract_address'])
@@ -102,30 +126,40 @@ class DexTradingClient:
         """
         abis = {}
         for token in tokens:
-            # Convert the token to uppercase when opening the file
-            with open(f'ABI/tokens/{token.upper()}.json', 'r') as file:
+            # ABI files are named after the lowercase token symbol
+            with open(f'ABI/tokens/{token.lower()}.json', 'r') as file:
                 abis[token] = json.load(file)
         return abis
 
+    def read(self, call):
+        """
+        Perform a read-only RPC call through the endpoint's circuit breaker, retrying connection errors with jitter.
+
+        Args:
+        - call (callable): Zero-argument function performing the read, e.g. a contract function's `call`.
+
+        Returns:
+        - The result of the call.
+        """
+        return retry_read(lambda: self.endpoint_breaker.call(call), retry_on=(requests.exceptions.RequestException,))
+
     def display_balances(self):
         """
         Display the balances of all supported tokens, including Ethereum, for the current user.
 
-        Prints:
+        Logs:
         - Ethereum balance.
         - Balance for each supported token.
         """
-        print(colored("Balances for client: " + self.client_name, 'yellow'))
-        
-        # Fetch and display Ethereum (ETH) balance
-        eth_balance = self.web3.from_wei(self.web3.eth.get_balance(self.public_key), 'ether')
-        print(colored(f"ETH: {eth_balance} Ether", 'green'))
+        # Fetch Ethereum (ETH) balance
+        balances = {"ETH": self.web3.fromWei(self.read(lambda: self.web3.eth.get_balance(self.public_key)), 'ether')}
 
-        # Fetch and display balances for all supported tokens
+        # Fetch balances for all supported tokens
         for token_symbol, token_data in self.tokens.items():
             balance = self.fetch_token_balance(token_symbol)
-            readable_balance = self.web3.from_wei(balance, 'ether')  # Assumes tokens have 18 decimals like Ether
-            print(colored(f"{token_symbol}: {readable_balance}", 'green'))
+            balances[token_symbol] = self.web3.fromWei(balance, 'ether')  # Assumes tokens have 18 decimals like Ether
+
+        log.info('balances', extra={'client': self.client_name, 'balances': balances})
 
     def fetch_token_balance(self, token_symbol: str) -> float:
         """
@@ -147,7 +181,7 @@ class DexTradingClient:
         token_abi = self.token_abis[token_symbol]
             
         token_contract = self.web3.eth.contract(address=token_address, abi=token_abi)
-        return token_contract.functions.balanceOf(self.public_key).call()
+        return self.read(token_contract.functions.balanceOf(self.public_key).call)
 
     def simulate_swap(self, token_in_address: str, token_out_address: str, amount_in: float) -> float:
         """
@@ -161,9 +195,9 @@ class DexTradingClient:
         Returns:
         - float: Expected output amount after performing the swap.
         """
-        amounts_out = self.uniswap_contract.functions.getAmountsOut(
+        amounts_out = self.read(self.uniswap_contract.functions.getAmountsOut(
             amount_in, [token_in_address, token_out_address]
-        ).call()
+        ).call)
         return amounts_out[-1]
 
     def is_received_amount_correct(self, token_in_address: str, token_out_address: str, amount_in: float, expected_amount_out: float) -> bool:
@@ -187,12 +221,12 @@ class DexTradingClient:
 
         return min_acceptable <= simulated_amount_out <= max_acceptable
 
-    def process_order(self, alert: dict) -> dict:
+    def process_order(self, alert: Alert) -> dict:
         """
         Process an order based on an alert received.
 
         Args:
-        - alert (dict): A dictionary containing order details. Expected to have the following keys:
+        - alert (Alert): The alert, already decoded and validated at ingress. Uses:
             - 'symbol': The trading pair (e.g., 'ETH/BTC').
             - 'price': The price at which the order is to be executed.
             - 'order_type': Type of the order (e.g., 'market').
@@ -207,12 +241,10 @@ class DexTradingClient:
         - May raise ValueError or other exceptions from called methods.
         """
 
-        # Extract necessary details from the alert
-        symbol = alert['symbol']
-        price = alert['price']
-        order_type = alert['order_type']
-        qty_perc = alert['qty_perc']
-        side = alert['side'].lower()  # Ensure the side is in lowercase for subsequent comparison
+        symbol = alert.symbol
+        price = alert.price
+        qty_perc = alert.qty_perc
+        side = alert.side
 
         # Check if the provided trading pair is supported by the DEX
         if not self.supports_pair(symbol):
@@ -224,23 +256,23 @@ class DexTradingClient:
         token2_address = self.tokens[token2]['contract_address']
 
         # Decide the input and output tokens based on the side of the trade
-        if side == 'buy':
+        if side == Side.BUY:
             token_out_address = token1_address
             token_in_address = token2_address
-            amount_in = self.fetch_balance(token2) * qty_perc / 100  # Determine amount of token2 to use for the swap
-        elif side == 'sell':
+            amount_in = int(self.fetch_token_balance(token2) * qty_perc / 100)  # Determine amount of token2 to use for the swap
+        elif side == Side.SELL:
             token_in_address = token1_address
             token_out_address = token2_address
-            amount_in = self.fetch_balance(token1) * qty_perc / 100  # Determine amount of token1 to use for the swap
+            amount_in = int(self.fetch_token_balance(token1) * qty_perc / 100)  # Determine amount of token1 to use for the swap
         else:
             return {"status": "error", "message": "Invalid side. Only 'buy' or 'sell' are supported."}
 
         # Ensure the order type is 'market' since that's the only supported type for this DEX client
-        if order_type != 'market':
+        if alert.order_type != OrderType.MARKET:
             return {"status": "error", "message": "Only market orders are supported for DEX."}
 
         # Estimate the expected output amount for the swap based on side and price
-        if side == 'buy':
+        if side == Side.BUY:
             expected_amount_out = amount_in / price  # Calculate expected amount of token1 received for given amount of token2
         else:  # sell
             expected_amount_out = amount_in * price  # Calculate expected amount of token2 received for given amount of token1
@@ -260,100 +292,121 @@ class DexTradingClient:
         and set up a connection to the Uniswap smart contract.
 
         Attributes set:
-        - self.web3: Instance of the Web3 connection.
+        - self.web3: Instance of the Web3 connection, shared with every client using the same URL.
         - self.account: Ethereum account derived from the private key.
-        - self.uniswap_contract: Web3 contract instance of the Uniswap smart contract.
+        - self.chain_id: Chain ID transactions are signed for.
+        - self.uniswap_contract: Web3 contract instance of the Uniswap V2 router.
 
         Raises:
         - FileNotFoundError: If the ABI file for Uniswap is missing.
         - JSONDecodeError: If there's an issue parsing the ABI.
         """
         
-        # Set up a Web3 connection using the provided Infura URL
-        self.web3 = Web3(Web3.HTTPProvider(self.infura_url))
+        # Reuse the pooled Web3 connection shared by all clients on the same Infura URL
+        self.web3 = self.providers.get_web3(self.infura_url)
 
         # Initialize an Ethereum account using the private key
-        self.account = self.web3.eth.account.privateKeyToAccount(self.private_key)
+        self.account = self.web3.eth.account.from_key(self.private_key)
+        self.chain_id = self.web3.eth.chain_id
 
-        # Load the ABI for the Uniswap smart contract from a JSON file
+        # Load the ABI for the Uniswap V2 router from a JSON file
         try:
-            with open('ABI/dex/uniswap.json', 'r') as file:
+            with open('ABI/dex/uniswap_v2_router.json', 'r') as file:
                 uniswap_abi = json.load(file)
         except FileNotFoundError:
             raise FileNotFoundError("The ABI file for Uniswap is missing!")
         except json.JSONDecodeError:
             raise json.JSONDecodeError("There's an issue parsing the ABI for Uniswap!")
 
-        # Set up a Web3 contract instance for the Uniswap smart contract using the ABI
-        # Make sure to replace 'UNISWAP_CONTRACT_ADDRESS' with the actual address for the specific Uniswap version/network you're using
-        self.uniswap_contract = self.web3.eth.contract(address='UNISWAP_CONTRACT_ADDRESS', abi=uniswap_abi)
+        # Set up a Web3 contract instance for the Uniswap V2 router of the configured network
+        self.uniswap_contract = self.web3.eth.contract(address=self.router_address, abi=uniswap_abi)
 
 
-def swap(self, token_in_address: str, token_out_address: str, amount_in: float, slippage: float = 0.01) -> dict:
-    """
-    Swap tokens on Uniswap, taking slippage into account.
+    def ensure_allowance(self, token_address: str, amount: int):
+        """
+        Approve the router to spend a token of the wallet if its current allowance is below `amount`.
 
-    Args:
-    - token_in_address (str): Contract address of the token to swap from.
-    - token_out_address (str): Contract address of the token to swap to.
-    - amount_in (float): Amount of `token_in` to swap.
-    - slippage (float, optional): Acceptable slippage percentage. Default is 1%.
+        Only `amount` is approved, so the router can never pull more than the swap needs, unless the wallet
+        opted into an unlimited approval, which saves an approval transaction per swap.
 
-    Returns:
-    - dict: Transaction receipt after the swap is executed.
-    """
+        Args:
+        - token_address (str): Contract address of the token to spend.
+        - amount (int): Amount the router is about to spend, in the smallest denomination.
+        """
+        token_contract = self.web3.eth.contract(address=token_address, abi=self.token_abis[self.token_by_address[token_address]])
+        allowance = self.read(token_contract.functions.allowance(self.account.address, self.router_address).call)
+        if allowance < amount:
+            approve_function = token_contract.functions.approve(self.router_address, MAX_UINT256 if self.unlimited_approval else amount)
+            gas_required = approve_function.estimate_gas({'from': self.account.address})
+            self.send_transaction(approve_function, gas_required, self.web3.eth.gas_price)
+
+    def send_transaction(self, function, gas: int, gas_price: int) -> dict:
+        """
+        Sign a contract call with the wallet key, send it and wait for it to be mined.
+
+        Args:
+        - function (ContractFunction): The contract call to send.
+        - gas (int): Gas limit of the transaction.
+        - gas_price (int): Gas price in wei.
+
+        Returns:
+        - dict: Transaction receipt.
+        """
+        transaction = function.build_transaction({
+            'chainId': self.chain_id,
+            'from': self.account.address,
+            'gas': gas,
+            'gasPrice': gas_price,
+            'nonce': self.web3.eth.get_transaction_count(self.account.address, 'pending'),
+        })
+        signed_txn = self.account.sign_transaction(transaction)
+        txn_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        return self.web3.eth.wait_for_transaction_receipt(txn_hash)
+
+    def swap(self, token_in_address: str, token_out_address: str, amount_in: int, slippage: float = 0.01) -> dict:
+        """
+        Swap tokens on Uniswap, taking slippage into account.
+
+        Args:
+        - token_in_address (str): Contract address of the token to swap from.
+        - token_out_address (str): Contract address of the token to swap to.
+        - amount_in (int): Amount of `token_in` to swap, in its smallest denomination.
+        - slippage (float, optional): Acceptable slippage percentage. Default is 1%.
+
+        Returns:
+        - dict: Transaction receipt after the swap is executed.
+        """
+        # The router can only pull tokens the wallet approved
+        self.ensure_allowance(token_in_address, amount_in)
+
+        # Simulate swap to get expected output
+        expected_output = self.simulate_swap(token_in_address, token_out_address, amount_in)
+
+        # Calculate minimum amount out based on slippage
+        min_output = int(expected_output * (1 - slippage))
+
+        # Deadline for the transaction
+        deadline = int(self.web3.eth.get_block('latest')['timestamp']) + 600
+
+        # Construct the swap function call
+        swap_function = self.uniswap_contract.functions.swapExactTokensForTokens(
+            amount_in,
+            min_output,
+            [token_in_address, token_out_address],
+            self.account.address,
+            deadline
+        )
+
+        # Check if the wallet has enough ETH to cover the gas fees
+        gas_required = swap_function.estimate_gas({'from': self.account.address})
+        gas_price = self.web3.eth.gas_price
+        available_balance = self.web3.eth.get_balance(self.account.address)
+        if available_balance < gas_required * gas_price:
+            raise ValueError(f'Insufficient ETH balance. Available: {available_balance}, Required: {gas_required * gas_price}')
+
+        # Sign, send and wait for the transaction to be mined
+        return self.send_transaction(swap_function, gas_required, gas_price)
 
-    # Check if the wallet has enough ETH to cover the gas fees
-    available_balance = self.web3.eth.getBalance(self.public_key)
-    gas_required = self.uniswap_contract.functions.swapExactTokensForTokens(
-        amount_in,
-        Web3.toWei(min_output, 'ether'),  # Convert to Wei format
-        [token_in_address, token_out_address],
-        self.account.address,
-        deadline
-    ).estimateGas({'from': self.public_key})
-
-    if available_balance < gas_required:
-        raise ValueError(f'Insufficient ETH balance. Available: {available_balance}, Required: {gas_required}')
-
-    # Simulate swap to get expected output
-    expected_output = self.simulate_swap(token_in_address, token_out_address, amount_in)
-
-    # Calculate minimum amount out based on slippage
-    min_output = expected_output * (1 - slippage)
-
-    # Deadline for the transaction
-    deadline = int(self.web3.eth.getBlock('latest')['timestamp']) + 600
-
-    # Construct the swap function call
-    swap_function = self.uniswap_contract.functions.swapExactTokensForTokens(
-        amount_in,
-        Web3.toWei(min_output, 'ether'),  # Convert to Wei format
-        [token_in_address, token_out_address],
-        self.account.address,
-        deadline
-    )
-
-    # Sign the transaction
-    signed_txn = self.web3.eth.account.signTransaction(
-        {
-            'chainId': 1,
-            'gas': gas_required,
-            'gasPrice': self.web3.eth.gasPrice,  # Fetching current gas price
-            'nonce': self.web3.eth.getTransactionCount(self.public_key),
-            'to': self.uniswap_contract.address,
-            'value': 0,
-            'data': swap_function.buildTransaction({'chainId': 1, 'nonce': self.web3.eth.getTransactionCount(self.public_key)})['data']  # Adding function call data
-        }
-    )
-
-    # Send the transaction
-    txn_hash = self.web3.eth.sendRawTransaction(signed_txn.rawTransaction)
-
-    # Wait for the transaction to be mined
-    txn_receipt = self.web3.eth.waitForTransactionReceipt(txn_hash)
-
-    return txn_receipt
 
 def get_token_symbol(web3: Web3, token_address: str, token_abi: dict) -> str:
     """
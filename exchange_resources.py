@@ -0,0 +1,167 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from clock_sync import exchange_host
+from structured_logging import get_logger
+
+log = get_logger('resources')
+
+# Attributes ccxt builds in set_markets, read-only once loaded and safe to share between instances
+MARKET_ATTRIBUTES = ('markets', 'markets_by_id', 'symbols', 'ids', 'currencies', 'currencies_by_id', 'codes',
+                     'baseCurrencies', 'quoteCurrencies')
+
+# Tables ccxt deep-copies from the exchange description into every instance and only reads afterwards.
+# URLs are left out as the API URL is set per instance, options are shared one level down (see share_description).
+DESCRIPTION_ATTRIBUTES = ('api', 'exceptions', 'httpExceptions', 'has', 'timeframes', 'fees', 'commonCurrencies',
+                          'requiredCredentials')
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every exchange instance talking to the same host.
+
+    ccxt throttles each instance (i.e. each API key) on its own, this bounds the combined request rate
+    of all the accounts served from one process, which exchanges limit per IP.
+
+    :param rate: Requests per second.
+    :param burst: Requests allowed back to back before throttling starts.
+    """
+
+    def __init__(self, rate: float, burst: int = 20):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1.0) -> None:
+        """
+        Take `cost` tokens, sleeping until they are available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the tokens now so concurrent callers queue up behind each other
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class ExchangeResources:
+    """
+    Exchange state shared by every TradingClient of the process, whichever user or subaccount it serves.
+
+    Clients share one pooled HTTP session, which keeps no cookies, one copy of each exchange's description tables, load market
+    metadata once per exchange host and draw from one rate limiter per host. Credentials, balances and
+    orders stay on each client.
+
+    :param pool_maxsize: Keep-alive connections kept per host.
+    :param host_rate_limit: Default combined requests per second allowed per host.
+    :param rate_limits: Per-host overrides of `host_rate_limit`, e.g. {'api.bybit.com': 100}.
+    """
+
+    def __init__(self, pool_maxsize: int = 64, host_rate_limit: float = 100.0, rate_limits: Optional[Dict[str, float]] = None):
+        self.host_rate_limit = host_rate_limit
+        self.rate_limits = dict(rate_limits or {})
+        self.session = requests.Session()
+        # The session serves every account, so no cookie set for one may be sent with another's requests
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._descriptions: Dict[str, dict] = {}
+        self._markets: Dict[Tuple[str, str], dict] = {}
+        self._market_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> RateLimiter:
+        """
+        Return the rate limiter of a host, creating it on first use.
+        """
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = RateLimiter(self.rate_limits.get(host, self.host_rate_limit))
+            return limiter
+
+    def throttle(self, exchange) -> None:
+        """
+        Make every request of an exchange instance wait for its host's shared rate limiter.
+
+        Register the clock monitor first, so time spent waiting here is not counted as request latency.
+
+        :param exchange: The ccxt exchange instance.
+        """
+        limiter = self.limiter(exchange_host(exchange))
+        fetch = exchange.fetch
+
+        def throttled_fetch(url, method='GET', headers=None, body=None):
+            limiter.acquire()
+            return fetch(url, method, headers, body)
+
+        exchange.fetch = throttled_fetch
+
+    def share_description(self, exchange) -> None:
+        """
+        Point an exchange instance at the description tables of the first instance of the same exchange.
+
+        ccxt gives every instance its own deep copy of the endpoint map, error mappings and capability flags,
+        which is most of an instance's memory before markets are loaded. The instance's own copies are
+        released here. Options stay a per-instance dict, since ccxt and the clock monitor set keys on it, but
+        nested option tables equal to the first instance's are shared.
+
+        :param exchange: The ccxt exchange instance, right after construction.
+        """
+        with self._lock:
+            shared = self._descriptions.get(exchange.id)
+            if shared is None:
+                shared = {name: getattr(exchange, name) for name in DESCRIPTION_ATTRIBUTES}
+                shared['options'] = dict(exchange.options)
+                self._descriptions[exchange.id] = shared
+                return
+        for name in DESCRIPTION_ATTRIBUTES:
+            setattr(exchange, name, shared[name])
+        options = shared['options']
+        for key, value in exchange.options.items():
+            if isinstance(value, (dict, list)) and options.get(key) == value:
+                exchange.options[key] = options[key]
+
+    def load_markets(self, exchange) -> dict:
+        """
+        Give an exchange instance the market metadata of its host, fetching it only for the first instance.
+
+        Later instances reuse the same market dictionaries instead of requesting and indexing their own
+        copy. Call it before the instance's first request that needs markets (e.g. fetch_balance or
+        fetch_position), otherwise ccxt loads the instance's own copy, currencies included, for that request.
+
+        :param exchange: The ccxt exchange instance, with its API URLs already set.
+        :return: Markets keyed by unified symbol.
+        """
+        key = (exchange.id, exchange_host(exchange))
+        with self._lock:
+            lock = self._market_locks.setdefault(key, threading.Lock())
+        with lock:
+            shared = self._markets.get(key)
+            if shared is None:
+                exchange.set_markets(exchange.fetch_markets())
+                shared = self._markets[key] = {name: getattr(exchange, name) for name in MARKET_ATTRIBUTES}
+                log.info('markets loaded', extra={'exchange': exchange.id, 'host': key[1], 'markets': len(exchange.markets)})
+            else:
+                for name, value in shared.items():
+                    setattr(exchange, name, value)
+        return shared['markets']
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# Resources shared by every client of the process unless a client is given its own
+shared_resources = ExchangeResources()
@@ -0,0 +1,194 @@
+"""
+Serve many AION_live users from one process.
+
+Every tenant logs in with its own account, joins its own Socket.IO room and trades with its own
+credentials file and trade store, while the exchange HTTP session, market metadata, rate limiters,
+clock monitors and Web3 providers are shared by all of them.
+
+Usage: python multi_tenant.py [tenants.json]
+"""
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import socketio
+
+import client_websocket as cw
+import dex_trading_client as dextc
+import trading_clients as tc
+from alerts import json_codec
+from exchange_resources import ExchangeResources, shared_resources
+from profiling import install_signal_handlers
+from structured_logging import get_logger
+from trade_store import TradeStore
+from web3_providers import Web3ProviderManager, provider_manager
+
+TENANTS_FILE = 'tenants.json'
+
+log = get_logger('tenants')
+
+
+class Tenant:
+    """
+    One AION_live user: its login, its Socket.IO connection and its trading clients.
+
+    :param config: The tenant's entry of the tenants file.
+    :param resources: Exchange resources shared with the other tenants.
+    :param providers: Web3 providers shared with the other tenants.
+    """
+
+    def __init__(self, config: Dict[str, Any], resources: ExchangeResources = shared_resources,
+                 providers: Web3ProviderManager = provider_manager):
+        self.name = config['name']
+        self.config = config
+        self.client_type = config.get('client_type', 'cex')
+        self.resources = resources
+        self.providers = providers
+        self.clients: Dict[str, Any] = {}
+        self.user_id = None
+        self.sio = socketio.Client(json=json_codec)
+
+    def build_clients(self) -> None:
+        """
+        Build the tenant's clients from its own credentials file.
+        """
+        if self.client_type == 'cex':
+            test_mode = self.config.get('test_mode', False)
+            credentials_path = self.config.get('credentials', tc.CREDENTIALS_FILE)
+            trade_store = TradeStore(self.config.get('trade_store', f"trades_{self.name}.db"))
+            self.clients = {
+                exchange: {
+                    subaccount: tc.TradingClient(exchange, subaccount, test_mode=test_mode, credentials_path=credentials_path,
+                                                 resources=self.resources, trade_store=trade_store)
+                    for subaccount in subaccounts
+                }
+                for exchange, subaccounts in self.config['exchanges'].items()
+            }
+        elif self.client_type == 'dex':
+            with open(self.config.get('credentials', 'dex_credentials.json'), 'r') as file:
+                dex_configurations = json.load(file)
+            chosen = self.config.get('dex_clients')
+            self.clients = {
+                client_data['client_name']: dextc.DexTradingClient(client_data, self.providers)
+                for client_data in dex_configurations
+                if chosen is None or client_data['client_name'] in chosen
+            }
+        else:
+            raise ValueError(f"Tenant '{self.name}' has invalid client_type '{self.client_type}', expected 'cex' or 'dex'")
+
+    def handle_updates(self, data: Dict[str, Any]) -> None:
+        log.info('new updates received', extra={'tenant': self.name, 'alerts': len(data['data'])})
+        cw.handle_alerts(data, self.client_type, self.clients)
+
+    def connect(self) -> None:
+        """
+        Log in and join the tenant's room, without blocking.
+
+        :raise ValueError: If the server rejects the tenant's credentials.
+        """
+        self.user_id = cw.authenticate(self.config['username'], self.config['password'])
+        if self.user_id is None:
+            raise ValueError(f"Login failed for tenant '{self.name}'")
+
+        self.sio.on('connect', lambda: self.sio.emit('join', {'room': self.user_id}))
+        self.sio.on('disconnect', lambda: log.warning('disconnected from the server', extra={'tenant': self.name}))
+        self.sio.on('new_updates', self.handle_updates)
+        self.sio.connect(f'{cw.BASE_URL}?user_id={self.user_id}')
+        log.info('tenant connected', extra={'tenant': self.name, 'user_id': self.user_id})
+
+    def start(self) -> None:
+        self.build_clients()
+        self.connect()
+
+    def stop(self) -> None:
+        if self.sio.connected:
+            self.sio.disconnect()
+
+
+class MultiTenantRuntime:
+    """
+    Start, run and stop the tenants of one process.
+
+    :param configs: Tenant entries of the tenants file.
+    :param resources: Exchange resources shared by all tenants.
+    :param providers: Web3 providers shared by all tenants.
+    :param startup_workers: Tenants started concurrently.
+    """
+
+    def __init__(self, configs: List[Dict[str, Any]], resources: ExchangeResources = shared_resources,
+                 providers: Web3ProviderManager = provider_manager, startup_workers: int = 8):
+        self.resources = resources
+        self.providers = providers
+        self.startup_workers = startup_workers
+        self.tenants = [Tenant(config, resources, providers) for config in configs]
+        self.running: List[Tenant] = []
+
+    def start(self) -> List[Tenant]:
+        """
+        Start every tenant concurrently. A tenant failing to start is logged and left out.
+
+        :return: The tenants running.
+        """
+        with ThreadPoolExecutor(max_workers=self.startup_workers, thread_name_prefix='tenant-start') as pool:
+            futures = {pool.submit(tenant.start): tenant for tenant in self.tenants}
+            for future in as_completed(futures):
+                tenant = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    log.error(f"Tenant failed to start: {e}", extra={'tenant': tenant.name})
+                    continue
+                self.running.append(tenant)
+        log.info('tenants started', extra={'running': len(self.running), 'configured': len(self.tenants)})
+        return self.running
+
+    def wait(self) -> None:
+        for tenant in self.running:
+            tenant.sio.wait()
+
+    def stop(self) -> None:
+        for tenant in self.running:
+            tenant.stop()
+        self.running = []
+        self.resources.close()
+
+
+def load_tenants(path: str = TENANTS_FILE) -> List[Dict[str, Any]]:
+    """
+    Read and check the tenants file.
+
+    :param path: Path of the tenants file.
+    :return: The tenant entries.
+    :raise ValueError: If an entry misses a required key or two entries share a name.
+    """
+    with open(path, 'r') as file:
+        configs = json.load(file)
+
+    names = set()
+    for config in configs:
+        required = ('name', 'username', 'password') + (('exchanges',) if config.get('client_type', 'cex') == 'cex' else ())
+        missing = [key for key in required if key not in config]
+        if missing:
+            raise ValueError(f"Tenant entry {config.get('name', '?')} is missing {missing}")
+        if config['name'] in names:
+            raise ValueError(f"Duplicate tenant name '{config['name']}'")
+        names.add(config['name'])
+    return configs
+
+
+def main() -> None:
+    runtime = MultiTenantRuntime(load_tenants(sys.argv[1] if len(sys.argv) > 1 else TENANTS_FILE))
+    if not runtime.start():
+        return
+    install_signal_handlers()
+    try:
+        runtime.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runtime.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+OPEN_STATUSES = ('open', None)
+
+# Orders requested per page, the largest page most exchanges serve (Bybit's default is 20)
+PAGE_SIZE = 50
+
+# Overlap between consecutive syncs, so clock offset error cannot skip an order. Orders seen twice are harmless.
+CURSOR_OVERLAP_MS = 1000
+
+
+def server_milliseconds(exchange) -> int:
+    """
+    The exchange's clock, from the local clock and the offset the clock monitor keeps in the exchange options.
+    """
+    return exchange.milliseconds() - int(exchange.options.get('timeDifference') or 0)
+
+
+class OpenOrderBook:
+    """
+    In-memory view of the open orders of one subaccount.
+
+    Orders are keyed by order ID and indexed by symbol, so "is anything open on X" and "open orders
+    for X" are answered without a request. The book is fed from order responses, cancels, open order
+    snapshots and incremental `since` queries; any order whose status is no longer open is dropped.
+
+    The book only counts as synced while every query it was built from is known to be complete: a page
+    that comes back full and cannot be continued, or a failed query, leaves it unsynced until the next
+    full snapshot, and callers then treat every symbol as possibly having open orders.
+    """
+
+    def __init__(self):
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self.since: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    @property
+    def is_synced(self) -> bool:
+        """
+        Whether the book has been filled from the exchange at least once.
+        """
+        return self.since is not None
+
+    def _remove(self, order_id: str) -> Optional[Dict[str, Any]]:
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            symbol_orders = self._by_symbol.get(order['symbol'])
+            if symbol_orders is not None:
+                symbol_orders.pop(order_id, None)
+                if not symbol_orders:
+                    del self._by_symbol[order['symbol']]
+        return order
+
+    def apply(self, order: Dict[str, Any], symbol: Optional[str] = None) -> None:
+        """
+        Insert, update or drop an order according to its status.
+
+        :param order: A ccxt order structure.
+        :param symbol: Symbol to use when the response does not carry one (e.g. bare create_order acks).
+        """
+        order_id = order.get('id')
+        if order_id is None:
+            return
+        with self._lock:
+            if order.get('status') not in OPEN_STATUSES:
+                self._remove(order_id)
+                return
+            order_symbol = order.get('symbol') or symbol
+            if order_symbol is None:
+                return
+            if order_id in self._orders and self._orders[order_id]['symbol'] != order_symbol:
+                self._remove(order_id)
+            order = dict(order, symbol=order_symbol)
+            self._orders[order_id] = order
+            self._by_symbol.setdefault(order_symbol, {})[order_id] = order
+
+    def remove(self, order_id: str) -> None:
+        """
+        Drop an order after it was cancelled or filled.
+
+        :param order_id: The exchange order ID.
+        """
+        with self._lock:
+            self._remove(order_id)
+
+    def clear_symbol(self, symbol: str) -> None:
+        """
+        Drop every order of a symbol, e.g. after a cancel-all.
+
+        :param symbol: Trading symbol.
+        """
+        with self._lock:
+            for order_id in list(self._by_symbol.get(symbol, ())):
+                self._remove(order_id)
+
+    def replace(self, orders: List[Dict[str, Any]]) -> None:
+        """
+        Reset the book to a full snapshot of open orders.
+
+        :param orders: Every currently open order.
+        """
+        with self._lock:
+            self._orders.clear()
+            self._by_symbol.clear()
+            for order in orders:
+                self.apply(order)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return an open order by ID, or None if it is not open.
+        """
+        return self._orders.get(order_id)
+
+    def has_open_orders(self, symbol: str) -> bool:
+        """
+        Whether any order is open for the symbol.
+        """
+        return bool(self._by_symbol.get(symbol))
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return the open orders, optionally restricted to one symbol.
+
+        :param symbol: Trading symbol, or None for every symbol.
+        :return: A list of ccxt order structures.
+        """
+        with self._lock:
+            if symbol is None:
+                return list(self._orders.values())
+            return list(self._by_symbol.get(symbol, {}).values())
+
+    def sync(self, exchange, symbols: Optional[Iterable[str]] = None, conditional_params: Optional[dict] = None,
+             page_size: int = PAGE_SIZE) -> None:
+        """
+        Bring the book up to date with the exchange.
+
+        The first call downloads every open order. Later calls only ask for orders created since the
+        previous sync started, in server time, page after page until a short page, when the exchange
+        supports it. Such queries filter on creation time (Bybit's even ignore `since` and return the
+        latest orders), so an order resting from before the cursor never shows up again when it fills
+        or is cancelled: symbols on which the book holds open orders are read again in full instead.
+
+        :param exchange: The ccxt exchange instance of the subaccount.
+        :param symbols: Symbols to query one by one, for exchanges that require a symbol. None queries all at once.
+        :param conditional_params: Params selecting conditional (stop, take-profit) orders, which some exchanges
+            only return when asked for, e.g. {'stop': True}. None if regular queries include them.
+        :param page_size: Orders requested per page.
+        """
+        queries = [(symbol, params) for symbol in (list(symbols) if symbols is not None else [None])
+                   for params in ([{}] if conditional_params is None else [{}, conditional_params])]
+        # Orders created from now on are left to the next sync
+        next_since = server_milliseconds(exchange) - CURSOR_OVERLAP_MS
+        try:
+            if self.since is None or not exchange.has.get('fetchOrders'):
+                complete = self._snapshot(exchange, queries, page_size)
+            else:
+                complete = True
+                for symbol in dict.fromkeys(symbol for symbol, _ in queries):
+                    symbol_queries = [query for query in queries if query[0] == symbol]
+                    held = self.has_open_orders(symbol) if symbol is not None else len(self) > 0
+                    if held:
+                        complete = self._snapshot(exchange, symbol_queries, page_size, whole_book=symbol is None) and complete
+                    else:
+                        complete = all([self._fetch_since(exchange, symbol, params, page_size) for _, params in symbol_queries]) and complete
+        except Exception:
+            # Part of the updates may be missing, the next sync starts from a full snapshot
+            self.since = None
+            raise
+        self.since = next_since if complete else None
+
+    def _snapshot(self, exchange, queries, page_size: int, whole_book: bool = True) -> bool:
+        """
+        Replace the book, or only the queried symbols' orders, with the open orders the queries return.
+        """
+        orders = []
+        complete = True
+        for symbol, params in queries:
+            page = exchange.fetch_open_orders(symbol, None, page_size, dict(params))
+            # Open orders are not paginated by time, a full page may hide more of them
+            complete = complete and len(page) < page_size
+            orders.extend(page)
+        if whole_book:
+            self.replace(orders)
+            return complete
+        with self._lock:
+            for symbol in {symbol for symbol, _ in queries}:
+                self.clear_symbol(symbol)
+            for order in orders:
+                self.apply(order)
+        return complete
+
+    def _fetch_since(self, exchange, symbol: Optional[str], params: dict, page_size: int) -> bool:
+        since = self.since
+        while True:
+            page = exchange.fetch_orders(symbol, since, page_size, dict(params))
+            for order in page:
+                self.apply(order)
+            if len(page) < page_size:
+                return True
+            newest = max((order['timestamp'] for order in page if order.get('timestamp') is not None), default=None)
+            if newest is None or newest <= since:
+                # A full page that does not move the cursor cannot be continued
+                return False
+            since = newest
@@ -0,0 +1,154 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from alerts import Alert, wire_value
+from structured_logging import get_logger
+from trading_clients import PairState, TradingClient, get_quote_currency
+
+log = get_logger('sizing')
+
+# Market rules assumed for a symbol a client has no state for
+_UNLISTED_PAIR = PairState()
+
+# Live position reads of the subaccounts of one close run concurrently, so a slow one does not delay every close
+_position_reads = ThreadPoolExecutor(max_workers=32, thread_name_prefix='position-read')
+
+
+class SizingResult:
+    """
+    Order quantities computed for every subaccount matching one alert.
+
+    :param clients: The subaccount clients, in the same order as the arrays.
+    :param quantities: Order quantity per client, already rounded down to the lot size.
+    :param below_minimum: True where the quantity is zero or under the market's min amount / min notional.
+    """
+
+    __slots__ = ('clients', 'quantities', 'below_minimum')
+
+    def __init__(self, clients: List[TradingClient], quantities: np.ndarray, below_minimum: np.ndarray):
+        self.clients = clients
+        self.quantities = quantities
+        self.below_minimum = below_minimum
+
+    def __iter__(self) -> Iterator[Tuple[TradingClient, float, bool]]:
+        for idx, client in enumerate(self.clients):
+            yield client, float(self.quantities[idx]), bool(self.below_minimum[idx])
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+
+def _market_arrays(clients: List[TradingClient], symbol: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collect lot size, amount decimals and minimum limits of `symbol` for every client.
+
+    :return: Tuple of (amount_step, amount_decimals, min_amount, min_cost) arrays.
+    """
+    count = len(clients)
+    amount_step = np.empty(count)
+    amount_decimals = np.empty(count)
+    min_amount = np.empty(count)
+    min_cost = np.empty(count)
+    for idx, client in enumerate(clients):
+        state = client.pairs.get(symbol) or _UNLISTED_PAIR
+        amount_decimals[idx] = state.amount_decimals
+        amount_step[idx] = state.amount_step
+        min_amount[idx] = state.min_amount
+        min_cost[idx] = state.min_cost
+    return amount_step, amount_decimals, min_amount, min_cost
+
+
+def _open_quantities(clients: List[TradingClient], symbol: str, percentage: float) -> Tuple[np.ndarray, float]:
+    """
+    Raw opening quantities: a percentage of what each client's free quote balance can buy.
+
+    The ticker is fetched once and shared by every client, since they all trade on the same exchange.
+
+    :return: Tuple of (quantities, price used for sizing).
+    """
+    quote_currency = get_quote_currency(symbol)
+    free_balance = np.fromiter(
+        ((client.balance.get(quote_currency) or {}).get('free') or 0.0 for client in clients),
+        dtype=float,
+        count=len(clients),
+    )
+    contract_price = clients[0].read(clients[0].exchange.fetch_ticker, symbol, hedge=True)['last']
+    return free_balance / contract_price * (percentage / 100.5), contract_price
+
+
+def _live_position(client: TradingClient, symbol: str) -> float:
+    """
+    Live position size of one client, NaN if it cannot be read so the account is skipped instead of the whole alert.
+    """
+    try:
+        return client.breaker.call(lambda: float(client.get_last_position_opened(symbol)['info']['size']))
+    except Exception as e:
+        log.error(f"Could not read the {symbol} position: {e}", extra={'exchange': client.exchange_id, 'subaccount': client.subaccount})
+        return math.nan
+
+
+def _close_quantities(clients: List[TradingClient], symbol: str, percentage: float, order_type: str) -> np.ndarray:
+    """
+    Raw closing quantities: a percentage of each client's open position.
+
+    Limit take-profits below 100% use the locally tracked position, everything else uses the live position
+    size, read for every client concurrently.
+    """
+    if percentage < 100 and order_type == 'limit':
+        positions = (client.open_position_contracts(symbol) for client in clients)
+    else:
+        positions = _position_reads.map(lambda client: _live_position(client, symbol), clients)
+    position_contracts = np.fromiter(positions, dtype=float, count=len(clients))
+    return position_contracts * (min(percentage, 100) / 100.0)
+
+
+def size_orders(alert: Alert, clients: List[TradingClient]) -> SizingResult:
+    """
+    Compute the order quantity of every subaccount for one alert in a single vectorized pass.
+
+    Quantities are rounded down to each market's lot size and accounts whose order would fall under
+    the minimum amount or minimum notional are flagged, so no order request is sent for them. Reduce-only
+    orders are exempt from the minimum notional, as on the exchange, and full closes from the minimum amount,
+    so a position is never left open for being small.
+
+    :param alert: The validated alert.
+    :param clients: Clients of the same exchange that support the alert's symbol.
+    :return: A SizingResult aligned with `clients`.
+    """
+    if not clients:
+        return SizingResult([], np.empty(0), np.empty(0, dtype=bool))
+
+    # Same check process_order applies, done once for every subaccount
+    clients[0].validate_order_details(alert)
+
+    # Balances and positions must include the bookkeeping of each client's previous order
+    for client in clients:
+        client.wait_post_processing()
+
+    symbol = alert.symbol
+    percentage = alert.qty_perc
+
+    if alert.reduce_only:
+        raw_quantities = _close_quantities(clients, symbol, percentage, wire_value(alert.order_type))
+        notional_price = alert.price
+    else:
+        raw_quantities, notional_price = _open_quantities(clients, symbol, percentage)
+
+    amount_step, amount_decimals, min_amount, min_cost = _market_arrays(clients, symbol)
+
+    # Round down to a whole number of lots, then strip float noise at the market's decimals
+    lots = np.floor(raw_quantities / amount_step + 1e-9)
+    scale = 10.0 ** amount_decimals
+    quantities = np.round(lots * amount_step * scale) / scale
+    quantities[~np.isfinite(quantities)] = 0.0
+
+    below_minimum = quantities <= 0
+    if not (alert.reduce_only and percentage >= 100):
+        below_minimum |= quantities < min_amount
+    if not alert.reduce_only and notional_price > 0 and math.isfinite(notional_price):
+        below_minimum |= quantities * notional_price < min_cost
+
+    return SizingResult(clients, quantities, below_minimum)
@@ -0,0 +1,244 @@
+"""
+On-demand profiling of the alert handler.
+
+Nothing is sampled or traced until the profiler is armed, at runtime, through its methods or with signals
+(see install_signal_handlers):
+
+- SIGUSR1 samples the stacks of every thread while the next N alerts are handled, and writes them in the
+  folded format read by flamegraph.pl, inferno and speedscope.
+- SIGUSR2 traces allocations with tracemalloc over the next N alert batches, and writes the growth of each
+  batch compared to the previous one.
+
+Usage: kill -USR1 <pid>, then e.g. flamegraph.pl profiles/alerts-*.folded > alerts.svg
+"""
+import contextlib
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+from structured_logging import get_logger
+
+log = get_logger('profiling')
+
+# Leaf frames of threads parked on a queue, event or selector, left out of the samples
+IDLE_FRAMES = frozenset({
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('selectors.py', 'select'),
+})
+
+# Shared no-op context returned while the profiler is disarmed
+_DISABLED = contextlib.nullcontext()
+
+_POOL_SUFFIX = re.compile(r'_\d+$')
+
+
+class StackSampler(threading.Thread):
+    """
+    Background thread counting the Python stacks of all other threads every `interval` seconds.
+
+    :param interval: Seconds between samples.
+    :param include_idle: Also count threads waiting on a queue, event or selector.
+    """
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            # Pool workers ('dispatch_0', 'dispatch_1', ...) are merged into one root per pool
+            names = {thread.ident: _POOL_SUFFIX.sub('', thread.name) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path: str) -> None:
+        """
+        Write the collected stacks, one 'root;...;leaf count' line each.
+        """
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class AlertProfiler:
+    """
+    Opt-in CPU and allocation profiling around alert handling.
+
+    The handler wraps every 'new_updates' event in `batch()` and every alert in `alert()`. While
+    disarmed both return a shared no-op context, so the hooks cost one attribute check.
+
+    :param output_dir: Folder the profiles are written to.
+    :param interval: Seconds between stack samples.
+    :param top: Allocation sites listed per batch diff.
+    """
+
+    def __init__(self, output_dir: str = 'profiles', interval: float = 0.005, top: int = 25):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top = top
+        self._alerts_remaining = 0
+        self._alerts_in_flight = 0
+        self._sampler: Optional[StackSampler] = None
+        self._batches_remaining = 0
+        self._batch_index = 0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._memory_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, extension: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.{extension}")
+
+    def arm(self, alerts: int = 20) -> None:
+        """
+        Sample stacks while the next `alerts` alerts are handled.
+        """
+        with self._lock:
+            self._alerts_remaining = alerts
+        log.info('stack sampling armed', extra={'alerts': alerts})
+
+    def arm_memory(self, batches: int = 5) -> None:
+        """
+        Trace allocations over the next `batches` alert batches, starting from a snapshot taken now.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._snapshot = self._take_snapshot()
+            self._batch_index = 0
+            self._batches_remaining = batches
+            self._memory_path = self._path('alloc', 'txt')
+        log.info('allocation tracing armed', extra={'batches': batches})
+
+    def alert(self):
+        """
+        Context wrapping the handling of one alert.
+        """
+        if not self._alerts_remaining:
+            return _DISABLED
+        return self._sample_alert()
+
+    def batch(self):
+        """
+        Context wrapping the handling of one batch of alerts.
+        """
+        if not self._batches_remaining:
+            return _DISABLED
+        return self._trace_batch()
+
+    @contextlib.contextmanager
+    def _sample_alert(self):
+        with self._lock:
+            sampled = self._alerts_remaining > 0
+            if sampled:
+                self._alerts_remaining -= 1
+                self._alerts_in_flight += 1
+                if self._sampler is None:
+                    self._sampler = StackSampler(self.interval)
+                    self._sampler.start()
+        try:
+            yield
+        finally:
+            if sampled:
+                self._finish_alert()
+
+    def _finish_alert(self) -> None:
+        with self._lock:
+            self._alerts_in_flight -= 1
+            if self._alerts_remaining or self._alerts_in_flight:
+                return
+            sampler, self._sampler = self._sampler, None
+        sampler.stop()
+        path = self._path('alerts', 'folded')
+        sampler.write_folded(path)
+        log.info('stack samples written', extra={'path': path, 'samples': sampler.samples,
+                                                 'seconds': round(time.time() - sampler.started_at, 3)})
+
+    @contextlib.contextmanager
+    def _trace_batch(self):
+        try:
+            yield
+        finally:
+            self._finish_batch()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def _finish_batch(self) -> None:
+        with self._lock:
+            if self._batches_remaining <= 0:
+                return
+            self._batches_remaining -= 1
+            self._batch_index += 1
+            snapshot = self._take_snapshot()
+            previous, self._snapshot = self._snapshot, snapshot
+            batch, path = self._batch_index, self._memory_path
+            if not self._batches_remaining:
+                self._snapshot = None
+                tracemalloc.stop()
+        stats = snapshot.compare_to(previous, 'lineno')
+        growth = sum(stat.size_diff for stat in stats)
+        with open(path, 'a') as file:
+            file.write(f"# batch {batch}: {growth / 1024:+.1f} KiB\n")
+            for stat in stats[:self.top]:
+                file.write(f"{stat}\n")
+            file.write("\n")
+        log.info('allocation diff written', extra={'path': path, 'batch': batch, 'growth_kib': round(growth / 1024, 1),
+                                                   'top': [str(stat) for stat in stats[:3]]})
+
+
+# Profiler hooked into the alert handler
+alert_profiler = AlertProfiler()
+
+
+def install_signal_handlers(profiler: AlertProfiler = alert_profiler, alerts: int = 20, batches: int = 5) -> bool:
+    """
+    Arm stack sampling on SIGUSR1 and allocation tracing on SIGUSR2. Must be called from the main thread.
+
+    :param profiler: The profiler to arm.
+    :param alerts: Alerts sampled per SIGUSR1.
+    :param batches: Alert batches traced per SIGUSR2.
+    :return: False on platforms without these signals (e.g. Windows).
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.arm(alerts))
+    signal.signal(signal.SIGUSR2, lambda signum, frame: profiler.arm_memory(batches))
+    return True
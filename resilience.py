@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from structured_logging import get_logger
+
+log = get_logger('resilience')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling through a circuit breaker that is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a subaccount or endpoint that keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and rejects calls for
+    `reset_timeout` seconds. It then lets `half_open_max_calls` probe calls through: a success closes
+    it again, a failure re-opens it for another `reset_timeout`.
+
+    :param name: Name used in logs, e.g. 'bybit:sub1' or 'api.bybit.com'.
+    :param failure_threshold: Consecutive failures that open the breaker.
+    :param reset_timeout: Seconds the breaker stays open before probing.
+    :param half_open_max_calls: Concurrent probe calls allowed while half-open.
+    :param failure_types: Exceptions that count as failures, others are re-raised without affecting the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 failure_types: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_types = failure_types
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """
+        Whether calls are currently rejected without being tried.
+        """
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is open")
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open and already probing")
+                self._probes += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                log.info(f"Circuit '{self.name}' closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log.warning(f"Circuit '{self.name}' opened after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probes = 0
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call `fn` through the breaker.
+
+        :raise CircuitOpenError: If the breaker is open.
+        """
+        self._acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            # Another breaker rejecting the call, or an error that says nothing about this one's health
+            if isinstance(e, CircuitOpenError) or not isinstance(e, self.failure_types):
+                self._release_probe()
+            else:
+                self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            self._probes = max(0, self._probes - 1)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Return the process-wide breaker of an endpoint, creating it on first use.
+
+    :param name: Endpoint name, e.g. the API host or RPC URL.
+    :param kwargs: CircuitBreaker settings used when it is created.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+class RequestBudget:
+    """
+    Number of requests one read may still send, shared by its retries and hedges.
+
+    :param requests: Requests the read may send in total.
+    """
+
+    __slots__ = ('remaining', '_lock')
+
+    def __init__(self, requests: int):
+        self.remaining = requests
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """
+        Reserve one request, False if the budget is spent.
+        """
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def retry_read(fn: Callable[[], Any], attempts: int = 3, base_delay: float = 0.1, max_delay: float = 1.0,
+               retry_on: Tuple[Type[BaseException], ...] = (Exception,), budget: Optional[RequestBudget] = None) -> Any:
+    """
+    Call an idempotent read, retrying transient errors with exponential backoff and full jitter.
+
+    An open circuit is never retried.
+
+    :param fn: The read to perform.
+    :param attempts: Total number of tries.
+    :param base_delay: Backoff ceiling of the first retry, in seconds.
+    :param max_delay: Upper bound of the backoff ceiling, in seconds.
+    :param retry_on: Exception types considered transient.
+    :param budget: Requests `fn` may send across all tries, no retry is made once `fn` has spent it.
+    :return: The result of `fn`.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except CircuitOpenError:
+            raise
+        except retry_on:
+            if attempt == attempts - 1 or (budget is not None and budget.remaining <= 0):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+
+
+def hedged_call(fn: Callable[[], Any], hedge_delay: float, budget: Optional[RequestBudget] = None) -> Any:
+    """
+    Call a read-only function and, if it has not answered after `hedge_delay`, race a duplicate request.
+
+    The first successful answer wins. Only use it for side-effect free calls such as tickers and positions.
+
+    :param fn: The read to perform.
+    :param hedge_delay: Seconds to wait before sending the duplicate.
+    :param budget: Requests the read may still send, the duplicate is skipped once it is spent.
+    :return: The result of whichever call answered first.
+    """
+    if budget is not None:
+        budget.take()
+    pending = {_hedge_executor.submit(fn)}
+    done, pending = wait(pending, timeout=hedge_delay)
+    if not done and (budget is None or budget.take()):
+        pending.add(_hedge_executor.submit(fn))
+    error = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        if not pending:
+            raise error
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
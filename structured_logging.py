@@ -0,0 +1,174 @@
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ROOT_LOGGER = 'aion'
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is emitted as a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render a record as one JSON line with its timestamp, level, subsystem, message and extra fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return _dumps(entry)
+
+
+class PayloadSampler(logging.Filter):
+    """
+    Keep the verbose `payload` field on one record out of every `rate`, strip it from the others.
+
+    The record itself is always kept, only the payload is sampled.
+    """
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if 'payload' in record.__dict__ and next(self._counter) % self.rate:
+            del record.payload
+            record.payload_sampled_out = True
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller.
+
+    Records are rendered to their JSON line on the caller's thread, so the background writer never reads
+    message arguments or payloads the caller may still be changing, and only writes. When the buffer is
+    full, records are dropped (and counted) before being rendered instead of waiting.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.queue.full():
+            self.dropped += 1
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A fresh record holding only the rendered line, which also releases the payload and traceback
+        return logging.makeLogRecord({
+            'name': record.name,
+            'levelno': record.levelno,
+            'levelname': record.levelname,
+            'created': record.created,
+            'msg': self.format(record),
+        })
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: str = 'INFO', stream: Optional[TextIO] = None, max_queue: int = 10000, payload_sample_rate: int = 10) -> None:
+    """
+    Route every `aion.*` logger through a bounded in-memory queue drained by a background writer.
+
+    Calling it again replaces the previous configuration.
+
+    :param level: Minimum level logged.
+    :param stream: Where JSON lines are written, stdout by default.
+    :param max_queue: Maximum number of buffered records before new ones are dropped.
+    :param payload_sample_rate: Keep the `payload` field on one record out of this many.
+    """
+    global _handler, _listener
+    with _lock:
+        shutdown_logging()
+        log_queue = queue.Queue(maxsize=max_queue)
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(logging.Formatter('%(message)s'))
+        _handler = BoundedQueueHandler(log_queue)
+        _handler.setFormatter(JsonFormatter())
+        _handler.addFilter(PayloadSampler(payload_sample_rate))
+        _listener = QueueListener(log_queue, writer, respect_handler_level=True)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [_handler]
+        root.setLevel(level)
+        root.propagate = False
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Flush buffered records and stop the background writer.
+    """
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _handler = None
+
+
+def dropped_records() -> int:
+    """
+    Number of records dropped because the buffer was full.
+    """
+    return _handler.dropped if _handler is not None else 0
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """
+    Return the logger of a subsystem (e.g. 'cex', 'dex', 'websocket'), configuring the defaults on first use.
+
+    Structured fields go through `extra`, e.g. `log.info('order sent', extra={'symbol': symbol, 'payload': order})`.
+
+    :param subsystem: Subsystem name, appended to the 'aion' root logger.
+    :return: A standard library logger.
+    """
+    if _listener is None:
+        with _lock:
+            needs_config = _listener is None
+        if needs_config:
+            configure_logging()
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+
+atexit.register(shutdown_logging)
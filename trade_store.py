@@ -0,0 +1,339 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DB_PATH = 'trades.db'
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# How far back the first sync of a symbol looks, so a new subaccount costs a handful of requests per pair
+HISTORY_MS = 30 * DAY_MS
+
+# Widest time range one trade query may cover, per exchange, unbounded if missing
+QUERY_WINDOW_MS = {'bybit': 7 * DAY_MS}
+
+# Request param bounding a trade query from above, per exchange, ccxt's unified 'until' if missing
+UNTIL_PARAMS = {'bybit': 'endTime'}
+
+# The cursor is set this far behind the sync time, so clock offset cannot skip a trade. Trades seen twice are ignored.
+CURSOR_OVERLAP_MS = 60 * 1000
+
+# strftime formats used to bucket trades by period
+PERIOD_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-W%W',
+    'month': '%Y-%m',
+    'year': '%Y',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    exchange TEXT NOT NULL,
+    subaccount TEXT NOT NULL,
+    trade_id TEXT NOT NULL,
+    order_id TEXT,
+    symbol TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    side TEXT,
+    amount REAL,
+    price REAL,
+    cost REAL,
+    fee REAL,
+    profit REAL,
+    PRIMARY KEY (exchange, subaccount, trade_id)
+);
+CREATE INDEX IF NOT EXISTS trades_by_symbol ON trades (exchange, subaccount, symbol, timestamp);
+CREATE INDEX IF NOT EXISTS trades_by_time ON trades (exchange, subaccount, timestamp);
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    exchange TEXT NOT NULL,
+    subaccount TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    since INTEGER NOT NULL,
+    PRIMARY KEY (exchange, subaccount, symbol)
+);
+CREATE TABLE IF NOT EXISTS closed_pnl (
+    exchange TEXT NOT NULL,
+    subaccount TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    profit REAL NOT NULL,
+    PRIMARY KEY (exchange, subaccount, record_id)
+);
+CREATE INDEX IF NOT EXISTS closed_pnl_by_time ON closed_pnl (exchange, subaccount, timestamp);
+CREATE TABLE IF NOT EXISTS closed_pnl_cursors (
+    exchange TEXT NOT NULL,
+    subaccount TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    since INTEGER NOT NULL,
+    PRIMARY KEY (exchange, subaccount, symbol)
+);
+CREATE VIEW IF NOT EXISTS profits AS
+    SELECT exchange, subaccount, symbol, timestamp, profit FROM trades WHERE profit IS NOT NULL
+    UNION ALL
+    SELECT exchange, subaccount, symbol, timestamp, profit FROM closed_pnl;
+"""
+
+
+def _trade_row(exchange_id: str, subaccount: str, trade: Dict[str, Any]) -> Tuple:
+    fee = trade.get('fee') or {}
+    return (
+        exchange_id,
+        subaccount,
+        str(trade['id']),
+        trade.get('order'),
+        trade['symbol'],
+        trade['timestamp'],
+        trade.get('side'),
+        trade.get('amount'),
+        trade.get('price'),
+        trade.get('cost'),
+        fee.get('cost'),
+        trade.get('profit'),
+    )
+
+
+def _bybit_closed_pnl(exchange, symbol: Optional[str], start: int, end: int, page_limit: int) -> Iterator[List[Tuple]]:
+    """
+    Pages of Bybit's closed PnL records (one per closing order, fees included) between `start` and `end`.
+
+    :return: Pages of (record id, symbol, timestamp, profit) rows.
+    """
+    request = {'category': 'linear', 'startTime': start, 'endTime': end, 'limit': min(page_limit, 100)}
+    if symbol is not None:
+        market = exchange.market(symbol)
+        request['symbol'] = market['id']
+        request['category'] = 'linear' if market.get('linear', True) else 'inverse'
+    while True:
+        result = exchange.privateGetV5PositionClosedPnl(request).get('result') or {}
+        rows = []
+        for record in result.get('list') or []:
+            record_symbol = symbol or exchange.safe_market(record.get('symbol'), None, None, 'swap')['symbol']
+            timestamp = exchange.safe_integer(record, 'updatedTime') or exchange.safe_integer(record, 'createdTime')
+            profit = exchange.safe_float(record, 'closedPnl')
+            if record_symbol is not None and timestamp is not None and profit is not None:
+                rows.append((f"{record.get('orderId')}:{timestamp}", record_symbol, timestamp, profit))
+        yield rows
+        cursor = result.get('nextPageCursor')
+        if not cursor or not result.get('list'):
+            return
+        request['cursor'] = cursor
+
+
+# Exchanges whose trades do not report a profit, and the pages of realized PnL records to use instead
+CLOSED_PNL_SOURCES: Dict[str, Callable[..., Iterator[List[Tuple]]]] = {'bybit': _bybit_closed_pnl}
+
+
+class TradeStore:
+    """
+    Append-only local copy of the trades and realized PnL of every (exchange, subaccount), kept in SQLite.
+
+    Trades are synced incrementally with a `since` cursor per symbol, so each sync only downloads
+    what is new, and aggregate queries run locally against indexed tables. ccxt trades rarely carry a
+    profit, so for exchanges in CLOSED_PNL_SOURCES the exchange's closed PnL records are synced the same
+    way and the profit queries read both. The first sync of a symbol backfills `history_ms` of history.
+
+    :param path: SQLite database file, or ':memory:'.
+    :param history_ms: How far back the first sync of a symbol looks, in milliseconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, history_ms: int = HISTORY_MS):
+        self.path = path
+        self.history_ms = history_ms
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_cursor(self, exchange_id: str, subaccount: str, symbol: Optional[str] = None, table: str = 'sync_cursors') -> Optional[int]:
+        """
+        Return the timestamp the next sync resumes from, or None before the first sync.
+
+        :param table: 'sync_cursors' for trades, 'closed_pnl_cursors' for closed PnL records.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT since FROM {table} WHERE exchange = ? AND subaccount = ? AND symbol = ?',
+                (exchange_id, subaccount, symbol or ''),
+            ).fetchone()
+        return row[0] if row else None
+
+    def add_trades(self, exchange_id: str, subaccount: str, trades: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append trades, ignoring the ones already stored and the ones without a timestamp.
+
+        :return: Number of trades actually inserted.
+        """
+        rows = [_trade_row(exchange_id, subaccount, trade) for trade in trades if trade.get('timestamp') is not None]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            return self._conn.total_changes - before
+
+    def add_closed_pnl(self, exchange_id: str, subaccount: str, rows: Iterable[Tuple]) -> int:
+        """
+        Append closed PnL records given as (record id, symbol, timestamp, profit), ignoring the ones already stored.
+
+        :return: Number of records actually inserted.
+        """
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO closed_pnl VALUES (?, ?, ?, ?, ?, ?)',
+                [(exchange_id, subaccount) + tuple(row) for row in rows],
+            )
+            return self._conn.total_changes - before
+
+    def _set_cursor(self, exchange_id: str, subaccount: str, symbol: Optional[str], since: int, table: str = 'sync_cursors') -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)',
+                (exchange_id, subaccount, symbol or '', since),
+            )
+
+    def _walk_windows(self, exchange_id: str, subaccount: str, exchange, symbol: Optional[str], table: str,
+                      sync_range: Callable[[int, int], int]) -> int:
+        """
+        Sync from the cursor in `table` (or `history_ms` back) to now, oldest window first, moving the
+        cursor after each window so an interrupted backfill resumes where it stopped.
+        """
+        now = exchange.milliseconds()
+        start = self.get_cursor(exchange_id, subaccount, symbol, table)
+        if start is None:
+            start = now - self.history_ms
+        window = QUERY_WINDOW_MS.get(exchange_id, now - start + 1)
+        inserted = 0
+        while start <= now:
+            end = min(start + window - 1, now)
+            inserted += sync_range(start, end)
+            self._set_cursor(exchange_id, subaccount, symbol, end + 1 if end < now else now - CURSOR_OVERLAP_MS, table)
+            start = end + 1
+        return inserted
+
+    def sync_symbol(self, exchange_id: str, subaccount: str, exchange, symbol: Optional[str] = None, page_limit: int = 100) -> int:
+        """
+        Download the trades of one symbol made since the last sync, or over `history_ms` on the first sync,
+        and the closed PnL records of the same range where the exchange reports them separately.
+
+        The range is walked oldest window first, so an interrupted backfill resumes where it stopped, and
+        each window is paged backwards from its end, as exchanges return the newest trades of a range first.
+
+        :param exchange_id: Identifier of the exchange.
+        :param subaccount: Name of the subaccount.
+        :param exchange: The ccxt exchange instance of the subaccount.
+        :param symbol: Trading symbol, or None for every symbol when the exchange allows it.
+        :param page_limit: Trades requested per page.
+        :return: Number of new trades stored.
+        """
+        inserted = self._walk_windows(
+            exchange_id, subaccount, exchange, symbol, 'sync_cursors',
+            lambda start, end: self._sync_range(exchange_id, subaccount, exchange, symbol, start, end, page_limit),
+        )
+        closed_pnl = CLOSED_PNL_SOURCES.get(exchange_id)
+        if closed_pnl is not None:
+            self._walk_windows(
+                exchange_id, subaccount, exchange, symbol, 'closed_pnl_cursors',
+                lambda start, end: sum(self.add_closed_pnl(exchange_id, subaccount, rows)
+                                       for rows in closed_pnl(exchange, symbol, start, end, page_limit)),
+            )
+        return inserted
+
+    def _sync_range(self, exchange_id: str, subaccount: str, exchange, symbol: Optional[str], start: int, end: int, page_limit: int) -> int:
+        until_param = UNTIL_PARAMS.get(exchange_id, 'until')
+        inserted = 0
+        while True:
+            trades = exchange.fetch_my_trades(symbol, since=start, limit=page_limit, params={until_param: end})
+            inserted += self.add_trades(exchange_id, subaccount, trades)
+            timestamps = [trade['timestamp'] for trade in trades if trade.get('timestamp') is not None]
+            if len(trades) < page_limit or not timestamps:
+                return inserted
+            # Trades sharing the oldest millisecond come back again and are ignored by the primary key,
+            # a full page stuck on one millisecond is skipped past to guarantee progress
+            oldest = min(timestamps)
+            end = oldest if oldest < end else end - 1
+            if end < start:
+                return inserted
+
+    def sync(self, exchange_id: str, subaccount: str, exchange, symbols: Optional[List[str]] = None, page_limit: int = 100) -> int:
+        """
+        Incrementally sync every given symbol (or all symbols at once if none are given).
+
+        :return: Number of new trades stored.
+        """
+        return sum(self.sync_symbol(exchange_id, subaccount, exchange, symbol, page_limit) for symbol in (symbols or [None]))
+
+    def _filters(self, exchange_id: str, subaccount: str, symbol: Optional[str], since: Optional[int]) -> Tuple[str, List[Any]]:
+        clauses = ['exchange = ?', 'subaccount = ?']
+        params: List[Any] = [exchange_id, subaccount]
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        return ' AND '.join(clauses), params
+
+    def last_profits_losses(self, exchange_id: str, subaccount: str, n: int, symbol: Optional[str] = None) -> List[float]:
+        """
+        Return the last `n` realized profits or losses, oldest first.
+        """
+        where, params = self._filters(exchange_id, subaccount, symbol, None)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT profit FROM profits WHERE {where} ORDER BY timestamp DESC LIMIT ?',
+                params + [n],
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def realized_pnl(self, exchange_id: str, subaccount: str, period: str = 'day', symbol: Optional[str] = None, since: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Sum realized profit and loss per period.
+
+        :param period: One of 'day', 'week', 'month' or 'year' (UTC).
+        :param symbol: Restrict to one trading symbol.
+        :param since: Only count trades from this timestamp in milliseconds.
+        :return: A list of (period label, pnl) tuples in chronological order.
+        """
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"Unsupported period '{period}', choose one of {list(PERIOD_FORMATS)}")
+        where, params = self._filters(exchange_id, subaccount, symbol, since)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT strftime(?, timestamp / 1000, 'unixepoch') AS bucket, SUM(profit) FROM profits "
+                f"WHERE {where} GROUP BY bucket ORDER BY bucket",
+                [PERIOD_FORMATS[period]] + params,
+            ).fetchall()
+
+    def win_rate(self, exchange_id: str, subaccount: str, symbol: Optional[str] = None, since: Optional[int] = None) -> Optional[float]:
+        """
+        Share of realized profits and losses that are positive.
+
+        :return: A ratio between 0 and 1, or None if there are no such trades.
+        """
+        where, params = self._filters(exchange_id, subaccount, symbol, since)
+        with self._lock:
+            wins, total = self._conn.execute(
+                f'SELECT SUM(profit > 0), COUNT(*) FROM profits WHERE {where}',
+                params,
+            ).fetchone()
+        return wins / total if total else None
+
+
+_default_store: Optional[TradeStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_trade_store() -> TradeStore:
+    """
+    Return the process-wide trade store, opening it on first use.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TradeStore()
+        return _default_store
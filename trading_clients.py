@@ -3,9 +3,19 @@
 
 
 import ccxt
+from ccxt.base.decimal_to_precision import TICK_SIZE
 import json
+import sys
 import time
-from typing import Dict, Tuple, Any, List, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Tuple, Any, List, Optional, Union
+from order_book import OpenOrderBook
+from trade_store import TradeStore, get_trade_store
+from structured_logging import get_logger
+from alerts import Alert, CLOSING_COMMENTS, Comment, OPENING_COMMENTS, wire_value
+from clock_sync import ClockMonitor, exchange_host, get_clock_monitor
+from resilience import CircuitBreaker, RequestBudget, get_breaker, hedged_call, retry_read
+from exchange_resources import ExchangeResources, shared_resources
 
 # Define terminal colors for visual cues
 GREEN = '\033[92m'
@@ -16,66 +26,160 @@ END_COLOR = '\033[0m'
 
 available_exchanges = ['bybit']
 
+CREDENTIALS_FILE = 'credentials.json'
+
+# Params selecting conditional (stop, take-profit) orders in ccxt order queries, for exchanges that leave them out otherwise
+CONDITIONAL_ORDER_QUERIES = {'bybit': {'stop': True}}
+
+# Order params that make an order rest on the exchange until a trigger price, whatever its type
+TRIGGER_PARAMS = ('stopPrice', 'triggerPrice', 'stopLossPrice', 'takeProfitPrice', 'stopLoss', 'takeProfit')
+
+# Errors that are a subaccount's own problem and open its breaker, rejected orders and network trouble do not
+SUBACCOUNT_FAILURES = (ccxt.AuthenticationError, ccxt.PermissionDenied, ccxt.AccountSuspended, ccxt.AccountNotEnabled)
+
+# Requests one exchange read may send, its retries and hedges included
+READ_ATTEMPTS = 3
+
+# Fields kept per currency from a ccxt balance
+BALANCE_FIELDS = ('free', 'used', 'total')
+
+log = get_logger('cex')
+
+# Workers shared by the bookkeeping of every client in the process, so threads do not grow with subaccounts
+_bookkeeping_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='bookkeeping')
+
+
+class PairState:
+    """
+    Market rules and tracked position of one pair traded by a subaccount.
+
+    Pairs the exchange does not list keep the defaults: 8 amount decimals and no minimums.
+    """
+
+    __slots__ = ('amount_decimals', 'amount_step', 'min_amount', 'min_cost', 'last_position_opened', 'init_position_contracts')
+
+    def __init__(self, last_position_opened: float = 0.0):
+        self.amount_decimals = 8
+        self.amount_step = 1e-8
+        self.min_amount = 0.0
+        self.min_cost = 0.0
+        self.last_position_opened = last_position_opened
+        self.init_position_contracts = last_position_opened
+
 
 class TradingClient:
-    def __init__(self, exchange_id: str, subaccount: str, test_mode: bool = False):
+    # A process can serve thousands of subaccounts, so clients carry no per-instance __dict__
+    __slots__ = ('exchange_id', 'subaccount', 'pairs_supported', 'currencies', 'pairs', 'balance', 'resources', 'exchange',
+                 'clock', 'breaker', 'endpoint_breaker', 'order_book', 'trade_store', '_pending_post_processing')
+
+    def __init__(self, exchange_id: str, subaccount: str, test_mode: bool = False, credentials_path: str = CREDENTIALS_FILE,
+                 resources: ExchangeResources = shared_resources, trade_store: Optional[TradeStore] = None):
         """
         Initialize a trading client for the given exchange.
 
         :param exchange_id: Identifier for the desired exchange.
         :param subaccount: Name of the subaccount within the exchange.
         :param test_mode: Boolean indicating whether the client should operate in test mode.
+        :param credentials_path: Credentials file of the user owning the subaccount.
+        :param resources: HTTP session, exchange description, market metadata and rate limiters shared with the other clients of the process.
+        :param trade_store: Store of the user's trade history, the process-wide store if not given.
         """
-        credentials = self.load_credentials(exchange_id, subaccount, test_mode)
+        credentials = self.load_credentials(exchange_id, subaccount, test_mode, credentials_path)
+        self.exchange_id = exchange_id
+        self.subaccount = subaccount
         self.pairs_supported = credentials["pair_supported"]
-        self.exchange = getattr(ccxt, exchange_id)({
+        self.currencies = traded_currencies(self.pairs_supported)
+        self.resources = resources
+        self.create_exchange(credentials, test_mode)
+        print(self.exchange.check_required_credentials())
+
+        # Clock offset and timeout are maintained per exchange host instead of adjusted per request
+        self.clock: ClockMonitor = get_clock_monitor(self.exchange)
+        self.clock.register(self.exchange)
+        self.resources.throttle(self.exchange)
+        # Before any private request, as ccxt loads the markets itself for those that need them
+        self.resources.load_markets(self.exchange)
+
+        # Only errors of the subaccount itself trip its own breaker, network trouble trips the shared host breaker
+        self.breaker = CircuitBreaker(f"{exchange_id}:{subaccount}", failure_types=SUBACCOUNT_FAILURES)
+        self.endpoint_breaker = get_breaker(exchange_host(self.exchange), failure_types=(ccxt.NetworkError,))
+
+        self.balance = self.get_balance()
+        self.pairs: Dict[str, PairState] = {}
+
+        print(YELLOW + "BALANCE:" + END_COLOR)
+        print(self.balance)
+        print(YELLOW + "POSITIONS OPEN:" + END_COLOR)
+        for pair in self.pairs_supported:
+            last_pos_opened = self.get_last_position_opened(pair)['info']['size']
+            self.pairs[pair] = PairState(float(last_pos_opened))
+            print({pair: last_pos_opened})
+
+        self.are_pairs_supported_and_set_precision()
+
+        self.init_order_pipeline()
+        self.fetch_active_orders()
+
+        self.trade_store: TradeStore = trade_store if trade_store is not None else get_trade_store()
+
+    def create_exchange(self, credentials: Dict[str, Any], test_mode: bool) -> None:
+        """
+        Build the subaccount's ccxt instance on the shared HTTP session and exchange description.
+
+        The instance is not yet registered with the clock monitor or the rate limiter.
+
+        :param credentials: The subaccount's entry of the credentials file.
+        :param test_mode: Boolean indicating whether to use the testnet URLs.
+        """
+        self.exchange = getattr(ccxt, self.exchange_id)({
             'apiKey': credentials['apiKey'],
             'secret': credentials['secret'],
             'enableRateLimit': True,
+            'session': self.resources.session,
             'options': {
                 'defaultType': credentials['market_type'],
                 'adjustForTimeDifference': False,
                 'tpslMode': 'Partial'
             },
         })
+        self.resources.share_description(self.exchange)
 
-        if exchange_id == 'bybit':
+        if self.exchange_id == 'bybit':
             self.exchange.options['enableUnifiedAccount'] = True
             self.exchange.options['enableUnifiedMargin'] = True
 
         self.exchange.verbose = False
         self.exchange.timeout = 30000
         self.exchange.urls['api'] = self.get_url(test_mode)
-        print(self.exchange.check_required_credentials())
-
-        self.balance = self.get_balance()
-        self.last_position_opened = {}
-        self.init_position_contracts = {}
 
-        print(YELLOW + "BALANCE USDT:" + END_COLOR)
-        print(self.balance["USDT"])
-        print(YELLOW + "POSITIONS OPEN:" + END_COLOR)
-        for pair in self.pairs_supported:
-            last_pos_opened = self.get_last_position_opened(pair)['info']['size']
-            self.last_position_opened[pair] = float(last_pos_opened)
-            self.init_position_contracts[pair] = self.last_position_opened[pair]
-            print({pair: last_pos_opened})
+    def init_order_pipeline(self):
+        """
+        Set up the order book and the state of the order pipeline.
 
-        self.precision = {}
-        self.are_pairs_supported_and_set_precision()
+        Post-order bookkeeping runs after the acknowledgement on the process-wide bookkeeping workers,
+        one order of this client at a time and in order.
+        """
+        self.order_book = OpenOrderBook()
+        self._pending_post_processing: Optional[Future] = None
 
     def are_pairs_supported_and_set_precision(self):
         """
-        Verifies if pairs are supported by the exchange and sets their precision.
+        Verifies if pairs are supported by the exchange and sets their precision, lot size and limits.
         """
-        markets = self.exchange.fetch_markets()
-        supported_pairs = [market['symbol'] for market in markets]
-        precision_dict = {market['symbol']: market['precision'] for market in markets}
+        markets = self.resources.load_markets(self.exchange)
 
         for pair in self.pairs_supported:
-            if pair in supported_pairs:
-                self.precision[pair] = len(str(precision_dict[pair]['amount']).split('.')[1])
-                print(GREEN + f"{pair} is supported by the exchange! Amount Precision: {self.precision[pair]}" + END_COLOR)
+            if pair in markets:
+                market = markets[pair]
+                state = self.pairs.setdefault(pair, PairState())
+                state.amount_decimals = len(str(market['precision']['amount']).split('.')[1])
+                if self.exchange.precisionMode == TICK_SIZE:
+                    state.amount_step = float(market['precision']['amount'])
+                else:
+                    state.amount_step = 10.0 ** -state.amount_decimals
+                state.min_amount = (market['limits'].get('amount') or {}).get('min') or 0.0
+                state.min_cost = (market['limits'].get('cost') or {}).get('min') or 0.0
+                print(GREEN + f"{pair} is supported by the exchange! Amount Precision: {state.amount_decimals}" + END_COLOR)
             else:
                 print(RED + f"{pair} is NOT supported by the exchange." + END_COLOR)
 
@@ -88,13 +192,61 @@ class TradingClient:
         """
         return pair in self.pairs_supported
 
-    def get_balance(self) -> Dict[str, Any]:
+    def read(self, fetch: Callable[..., Any], *args: Any, hedge: bool = False) -> Any:
         """
-        Fetch the balance for the initialized exchange.
+        Perform an idempotent exchange read through the host's circuit breaker, retrying network errors with jitter.
 
-        :return: A dictionary containing balance details.
+        A read sends at most READ_ATTEMPTS requests, hedges included.
+
+        :param fetch: The ccxt read method, e.g. self.exchange.fetch_ticker.
+        :param args: Arguments of the read.
+        :param hedge: Send a duplicate request if the first one is slower than usual, for latency-critical reads.
+        :return: The read result.
+        """
+        def attempt():
+            return self.endpoint_breaker.call(fetch, *args)
+
+        if hedge:
+            budget = RequestBudget(READ_ATTEMPTS)
+            return retry_read(lambda: hedged_call(attempt, self.hedge_delay(), budget), attempts=READ_ATTEMPTS,
+                              retry_on=(ccxt.NetworkError,), budget=budget)
+        return retry_read(attempt, attempts=READ_ATTEMPTS, retry_on=(ccxt.NetworkError,))
+
+    def write(self, send: Callable[..., Any], *args: Any) -> Any:
+        """
+        Send a non-idempotent exchange request through the host's circuit breaker, without retries.
+
+        :param send: The ccxt method, e.g. self.exchange.create_order.
+        :param args: Arguments of the request.
+        :return: The request result.
+        """
+        return self.endpoint_breaker.call(send, *args)
+
+    def hedge_delay(self) -> float:
+        """
+        Seconds to wait before hedging a read: the host's p95 latency, or half a second until it is known.
+        """
+        latency = self.clock.latency_percentile_ms(0.95)
+        return 0.5 if latency is None else latency / 1000
+
+    def get_balance(self) -> Dict[str, Dict[str, float]]:
         """
-        return self.exchange.fetch_balance({"type": "fund", "accountType": "UNIFIED"})
+        Fetch the balance of the currencies the subaccount trades.
+
+        :return: Free, used and total amounts keyed by currency code.
+        """
+        return self.prune_balance(self.read(self.exchange.fetch_balance, {"type": "fund", "accountType": "UNIFIED"}))
+
+    def prune_balance(self, balance: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """
+        Keep only the free, used and total amounts of the traded currencies from a ccxt balance.
+
+        The raw exchange response, the per-field maps and the coins the subaccount does not trade are dropped.
+
+        :param balance: The result of fetch_balance.
+        :return: Free, used and total amounts keyed by currency code.
+        """
+        return {code: {field: balance[code].get(field) for field in BALANCE_FIELDS} for code in self.currencies if code in balance}
 
     def get_last_position_opened(self, symbol: str) -> Dict[str, Any]:
         """
@@ -103,7 +255,7 @@ class TradingClient:
         :param symbol: Trading symbol.
         :return: A dictionary with details about the position.
         """
-        return self.exchange.fetch_position(symbol)
+        return self.read(self.exchange.fetch_position, symbol, hedge=True)
 
     def get_url(self, test_mode: bool) -> str:
         """
@@ -117,16 +269,17 @@ class TradingClient:
         else:
             return self.exchange.urls['api']
 
-    def load_credentials(self, exchange_id: str, subaccount: str, test_mode: bool) -> Dict[str, Any]:
+    def load_credentials(self, exchange_id: str, subaccount: str, test_mode: bool, credentials_path: str = CREDENTIALS_FILE) -> Dict[str, Any]:
         """
         Load the credentials for a given exchange and subaccount.
 
         :param exchange_id: Identifier for the desired exchange.
         :param subaccount: Name of the subaccount within the exchange.
         :param test_mode: Boolean indicating whether to load testnet credentials.
+        :param credentials_path: Path of the credentials file.
         :return: A dictionary containing the credentials.
         """
-        with open('credentials.json', 'r') as file:
+        with open(credentials_path, 'r') as file:
             credentials = json.load(file)
             if test_mode and f"{exchange_id}_testnet" in credentials:
                 return credentials[f"{exchange_id}_testnet"]['sub_acc'][subaccount]
@@ -138,10 +291,11 @@ class TradingClient:
         Fetch the number of contracts in an open position for the given trading pair.
         """
         # Retrieve all open positions
-        open_position = self.last_position_opened[pair]>0
+        last_position_opened = self.pairs[pair].last_position_opened
+        open_position = last_position_opened>0
 
         if open_position:
-            return self.last_position_opened[pair]  # or 'quantity' or other relevant key depending on the exchange
+            return last_position_opened  # or 'quantity' or other relevant key depending on the exchange
         else:
             return 0
         
@@ -151,7 +305,7 @@ class TradingClient:
         """
         quote_currency = get_quote_currency(pair)
         balance = self.balance[quote_currency]['free']
-        contract_price = self.exchange.fetch_ticker(pair)['last']
+        contract_price = self.read(self.exchange.fetch_ticker, pair, hedge=True)['last']
         
         # Assuming balance is in the quote currency (e.g., USDT for BTC/USDT)
         #
@@ -177,51 +331,101 @@ class TradingClient:
             return float(self.get_last_position_opened(pair)['info']['size'])
 
             
-    def process_order(self, strategy_dict: Dict[str, Any]) -> Any:
+    def process_order(self, alert: Alert, order_n_contracts: Optional[float] = None) -> Any:
         """
-        Process the order based on provided strategy.
+        Process the order based on provided alert.
 
-        :param strategy_dict: A dictionary containing order details.
+        Opening orders first cancel the symbol's open orders, but only once sizing has decided an order is
+        sent, so a subaccount that cannot trade keeps its resting stop-loss and take-profit orders. The
+        bookkeeping (position, balance and order book refresh) is deferred until after the order is acknowledged.
+
+        :param alert: The alert, already decoded and validated at ingress.
+        :param order_n_contracts: Quantity already sized for this subaccount (see position_sizing), computed here if omitted.
         :return: Executed order or a message indicating insufficient funds.
         """
         
-        # Extract order details
-        symbol, side, order_type, quantity_percent, price, reduce_only, stop_price, comment = self.extract_order_details(strategy_dict)
-        
-        # Validate extracted order details
-        self.validate_order_details(symbol, side, order_type, quantity_percent, price, reduce_only)
+        # Check the fields only CEX orders need
+        self.validate_order_details(alert)
+        symbol = alert.symbol
+        order_type = wire_value(alert.order_type)
 
         # Determine the number of contracts
-        order_n_contracts = self.get_order_contracts(symbol, quantity_percent, reduce_only, order_type)
-        
+        if order_n_contracts is None:
+            self.wait_post_processing()
+            order_n_contracts = self.get_order_contracts(symbol, alert.qty_perc, alert.reduce_only, order_type)
+
         # Execute order if valid contract number
         if order_n_contracts > 0:
-            order = self.execute_order(symbol, side, order_type, order_n_contracts, price, reduce_only, stop_price)
-            self.post_order_processing(symbol, order_n_contracts, reduce_only, comment)
+            # Opening orders replace whatever is still open on the symbol
+            if not alert.reduce_only:
+                self.cancel_open_orders(symbol)
+            order = self.execute_order(symbol, alert.side.value, order_type, order_n_contracts, alert.price, alert.reduce_only, alert.stop_price)
+            self.defer_post_processing(symbol, order_n_contracts, alert.reduce_only, alert.comment)
             return order
         else:
             return RED + "Not sufficient funds to execute order" + END_COLOR
-        
-    def extract_order_details(self, strategy_dict: Dict[str, Any]) -> Tuple[str, str, str, float, float, bool, float, str]:
+
+    def cancel_open_orders(self, symbol: str) -> None:
         """
-        Extract order details from the strategy dictionary.
+        Cancel every open order of a symbol, skipping the round trip when the order book knows nothing is open.
 
-        :param strategy_dict: A dictionary containing order details.
-        :return: Extracted order details.
+        :param symbol: Trading symbol.
         """
-        
-        keys = ['symbol', 'side', 'order_type', 'qty_perc', 'price', 'reduceOnly', 'stopPrice', 'comment']
-        return (strategy_dict.get(key, None) for key in keys)
+        if not self.order_book.is_synced or self.order_book.has_open_orders(symbol):
+            self.write(self.exchange.cancel_all_unified_account_orders, symbol)
+            self.order_book.clear_symbol(symbol)
 
-    def validate_order_details(self, *args: Any) -> None:
+    def wait_post_processing(self) -> None:
+        """
+        Block until the bookkeeping of the previous order is done, so balances and positions are current.
         """
-        Validate the extracted order details.
+        pending = self._pending_post_processing
+        if pending is not None:
+            pending.result()
 
-        :param args: Extracted order details.
+    def defer_post_processing(self, symbol: str, order_n_contracts: float, reduce_only: bool, comment: Union[Comment, str, None]) -> Future:
+        """
+        Queue the bookkeeping of an acknowledged order behind the bookkeeping of this client's previous order.
+
+        The bookkeeping is only handed to the shared workers once the previous one is done, so the orders
+        of a client are booked one at a time and in order without holding a worker while they wait.
+
+        :return: The future of the bookkeeping, also awaited by `wait_post_processing`.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                self._run_post_processing(symbol, order_n_contracts, reduce_only, comment)
+            finally:
+                future.set_result(None)
+
+        previous = self._pending_post_processing
+        self._pending_post_processing = future
+        if previous is None:
+            _bookkeeping_executor.submit(run)
+        else:
+            # Runs right away if the previous bookkeeping is already done
+            previous.add_done_callback(lambda _: _bookkeeping_executor.submit(run))
+        return future
+
+    def _run_post_processing(self, symbol: str, order_n_contracts: float, reduce_only: bool, comment: Union[Comment, str, None]) -> None:
+        try:
+            self.post_order_processing(symbol, order_n_contracts, reduce_only, comment)
+        except Exception as e:
+            log.exception(f"An error occurred during post order processing: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount, 'symbol': symbol})
+
+    def validate_order_details(self, alert: Alert) -> None:
+        """
+        Validate the alert fields that are optional at ingress but required for CEX orders.
+
+        :param alert: The alert to check.
         :raise ValueError: If any of the required order parameters is missing.
         """
         
-        if None in args:
+        if alert.reduce_only is None:
             raise ValueError("One or more required order parameters are missing")
 
     def get_order_contracts(self, symbol: str, quantity_percent: float, reduce_only: bool, type_order: str) -> int:
@@ -252,23 +456,28 @@ class TradingClient:
         :return: Executed order.
         """
         
+        params = {}
         if not reduce_only:
-            print(YELLOW+'SENDING MARKET ORDER...'+END_COLOR)
-            self.exchange.cancel_all_unified_account_orders(symbol)
-            return self.exchange.create_order(symbol, order_type, side, order_n_contracts, None)
+            log.info('sending market order', extra={'exchange': self.exchange_id, 'subaccount': self.subaccount, 'symbol': symbol, 'side': side, 'amount': order_n_contracts})
+            order = self.write(self.exchange.create_order, symbol, order_type, side, order_n_contracts, None)
         elif stop_price:
-            print(YELLOW+'SENDING STOPLOSS ORDER...'+END_COLOR)
+            log.info('sending stoploss order', extra={'exchange': self.exchange_id, 'subaccount': self.subaccount, 'symbol': symbol, 'side': side, 'amount': order_n_contracts, 'stop_price': stop_price})
             params = {'stopLossPrice': stop_price}
-            return self.exchange.create_order(symbol, order_type, side, order_n_contracts, price, params)
+            order = self.write(self.exchange.create_order, symbol, order_type, side, order_n_contracts, price, params)
         else:
-            print(YELLOW+'SENDING TAKEPROFIT ORDER...'+END_COLOR)
+            log.info('sending takeprofit order', extra={'exchange': self.exchange_id, 'subaccount': self.subaccount, 'symbol': symbol, 'side': side, 'amount': order_n_contracts, 'price': price})
             if order_type == 'limit':
                 params = {'takeProfitPrice': price}
             else:
                 params = {'reduceOnly': reduce_only}
-            return self.exchange.create_order(symbol, order_type, side, order_n_contracts, price, params)
+            order = self.write(self.exchange.create_order, symbol, order_type, side, order_n_contracts, price, params)
+
+        # Only orders filling on arrival stay out of the book, conditional market orders rest until triggered
+        if order_type != 'market' or any(params.get(key) for key in TRIGGER_PARAMS):
+            self.order_book.apply(order, symbol=symbol)
+        return order
 
-    def post_order_processing(self, symbol: str, order_n_contracts: int, reduce_only: bool, comment: str) -> None:
+    def post_order_processing(self, symbol: str, order_n_contracts: int, reduce_only: bool, comment: Union[Comment, str, None]) -> None:
         """
         Process steps after the order is executed.
 
@@ -278,34 +487,52 @@ class TradingClient:
         
         time.sleep(1)
 
-        if comment == 'openlong' or comment == 'openshort':
-            self.last_position_opened[symbol] = float(self.get_last_position_opened(symbol)['info']['size'])
-            self.init_position_contracts[symbol] = self.last_position_opened[symbol]
-        elif comment == 'set take profit' or comment == 'closelong' or comment == 'closeshort':
-            self.last_position_opened[symbol] += -order_n_contracts
-        elif comment == 'closelong' or comment == 'closeshort':
-            self.last_position_opened[symbol] = float(self.get_last_position_opened(symbol)['info']['size'])
+        state = self.pairs[symbol]
+        if comment in OPENING_COMMENTS:
+            state.last_position_opened = float(self.get_last_position_opened(symbol)['info']['size'])
+            state.init_position_contracts = state.last_position_opened
+        elif comment in CLOSING_COMMENTS:
+            state.last_position_opened += -order_n_contracts
 
         self.balance = self.get_balance()
-        print(YELLOW+'New Balance:'+END_COLOR)
+        self.fetch_active_orders()
         quote_currency = get_quote_currency(symbol)
-        balance = self.balance[quote_currency]["free"]
-        print(balance)
-        print(YELLOW+'Free position contracts:'+END_COLOR)
-        print(self.last_position_opened[symbol])
+        log.info('post order state', extra={
+            'exchange': self.exchange_id,
+            'subaccount': self.subaccount,
+            'symbol': symbol,
+            'free_balance': self.balance[quote_currency]["free"],
+            'free_position_contracts': state.last_position_opened,
+        })
 
-    def fetch_active_orders(self) -> List[Dict[str, Union[str, float, int]]]:
+    def fetch_active_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Union[str, float, int]]]:
         """
-        Fetch the active orders from the exchange.
+        Bring the local order book up to date and return the active orders.
+
+        Only the first call downloads every open order, later calls fetch orders updated since the last sync.
 
+        :param symbol: Restrict the result to this symbol, or None for all symbols.
         :return: A list of active orders or an empty list if an error occurs.
         """
         try:
-            return self.exchange.fetch_open_orders()
+            self.order_book.sync(self.exchange, self.pairs_supported, CONDITIONAL_ORDER_QUERIES.get(self.exchange_id))
+            return self.order_book.open_orders(symbol)
         except Exception as e:
-            print(RED + f"An error occurred while fetching active orders: {e}" + END_COLOR)
+            log.error(f"An error occurred while fetching active orders: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount})
             return []
 
+    def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+        """
+        Cancel a single order and drop it from the local order book.
+
+        :param order_id: The exchange order ID.
+        :param symbol: Trading symbol of the order.
+        :return: The cancelled order.
+        """
+        order = self.write(self.exchange.cancel_order, order_id, symbol)
+        self.order_book.remove(order_id)
+        return order
+
     def fetch_wallet_balance(self) -> Optional[Dict[str, Union[str, float, int]]]:
         """
         Fetch the wallet balance from the exchange.
@@ -313,25 +540,61 @@ class TradingClient:
         :return: A dictionary containing wallet balance details or None if an error occurs.
         """
         try:
-            return self.exchange.fetch_balance({"type": "fund", "accountType": "UNIFIED"})
+            return self.read(self.exchange.fetch_balance, {"type": "fund", "accountType": "UNIFIED"})
         except Exception as e:
-            print(RED + f"An error occurred while fetching the wallet balance: {e}" + END_COLOR)
+            log.error(f"An error occurred while fetching the wallet balance: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount})
             return None
 
+    def sync_trades(self) -> int:
+        """
+        Download the trades made since the last sync into the local trade store.
+
+        :return: Number of new trades stored.
+        """
+        return self.trade_store.sync(self.exchange_id, self.subaccount, self.exchange, self.pairs_supported)
+
     def fetch_last_n_profits_losses(self, n: int) -> List[float]:
         """
-        Fetch the last 'n' profit and loss details from the exchange.
+        Fetch the last 'n' profit and loss details, syncing only new trades from the exchange.
 
         :param n: The number of profit and loss details to retrieve.
         :return: A list of profits and losses or an empty list if an error occurs.
         """
         try:
-            trades = self.exchange.fetch_my_trades(limit=n)
-            profits_losses = [trade['profit'] for trade in trades if 'profit' in trade]
-            return profits_losses
+            self.sync_trades()
+            return self.trade_store.last_profits_losses(self.exchange_id, self.subaccount, n)
         except Exception as e:
-            print(RED + f"An error occurred while fetching the last {n} profits and losses: {e}" + END_COLOR)
+            log.error(f"An error occurred while fetching the last {n} profits and losses: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount})
             return []
+
+    def realized_pnl(self, period: str = 'day', symbol: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Realized profit and loss per period, computed from the local trade store after an incremental sync.
+
+        :param period: One of 'day', 'week', 'month' or 'year'.
+        :param symbol: Restrict to one trading symbol.
+        :return: A list of (period, pnl) tuples or an empty list if an error occurs.
+        """
+        try:
+            self.sync_trades()
+            return self.trade_store.realized_pnl(self.exchange_id, self.subaccount, period, symbol)
+        except Exception as e:
+            log.error(f"An error occurred while computing the realized PnL: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount})
+            return []
+
+    def win_rate(self, symbol: Optional[str] = None) -> Optional[float]:
+        """
+        Share of winning trades, computed from the local trade store after an incremental sync.
+
+        :param symbol: Restrict to one trading symbol.
+        :return: A ratio between 0 and 1, or None if there are no trades or an error occurs.
+        """
+        try:
+            self.sync_trades()
+            return self.trade_store.win_rate(self.exchange_id, self.subaccount, symbol)
+        except Exception as e:
+            log.error(f"An error occurred while computing the win rate: {e}", extra={'exchange': self.exchange_id, 'subaccount': self.subaccount})
+            return None
         
 # FUNCTIONS
 
@@ -386,7 +649,7 @@ def choose_subaccounts(exchange: str) -> List[str]:
     :return: A list of chosen subaccounts for the given exchange.
     """
     print(f"Please choose subaccounts for {exchange}:")
-    with open('credentials.json', 'r') as file:
+    with open(CREDENTIALS_FILE, 'r') as file:
         credentials = json.load(file)
         subaccounts = list(credentials[exchange]['sub_acc'].keys())
         for subaccount in subaccounts:
@@ -404,6 +667,22 @@ def choose_subaccounts(exchange: str) -> List[str]:
 
     return chosen_subaccounts
 
+def traded_currencies(pairs: List[str]) -> Tuple[str, ...]:
+    """
+    Currencies involved in trading the given pairs: bases, quotes and settlement currencies.
+
+    Codes are interned, so the clients of a fleet trading the same pairs share one copy of each.
+
+    :param pairs: Trading pair strings, e.g. 'BTC/USDT:USDT'.
+    :return: The currency codes, in order of first appearance.
+    """
+    currencies = {}
+    for pair in pairs:
+        base, quote = pair.split(':')[0].split('/')
+        for code in (base, quote, get_quote_currency(pair)):
+            currencies.setdefault(sys.intern(code), None)
+    return tuple(currencies)
+
 def get_quote_currency(pair: str) -> str:
     """
     Extract the quote currency from a given trading pair.
@@ -0,0 +1,493 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.eth import AsyncEth
+from web3.net import AsyncNet
+from web3.providers.async_rpc import AsyncHTTPProvider
+from web3.providers.rpc import HTTPProvider
+from web3.providers.websocket import WebsocketProvider
+import websocket
+
+
+class EndpointStats:
+    """
+    Thread-safe latency and error counters for a single RPC endpoint.
+
+    Attributes:
+    - endpoint (str): The endpoint URL the counters belong to.
+    - requests (int): Number of requests sent.
+    - errors (int): Number of requests that raised or returned a JSON-RPC error.
+    - total_latency (float): Sum of request latencies in seconds.
+    - max_latency (float): Slowest request latency in seconds.
+    - last_error (str): Description of the most recent error, if any.
+    """
+
+    __slots__ = ('endpoint', 'requests', 'errors', 'total_latency', 'max_latency', 'last_error', '_lock')
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, error: Optional[str] = None):
+        """
+        Record the outcome of one request.
+
+        Args:
+        - elapsed (float): Request latency in seconds.
+        - error (str, optional): Error description if the request failed.
+        """
+        with self._lock:
+            self.requests += 1
+            self.total_latency += elapsed
+            if elapsed > self.max_latency:
+                self.max_latency = elapsed
+            if error is not None:
+                self.errors += 1
+                self.last_error = error
+
+    def snapshot(self) -> dict:
+        """
+        Return a consistent copy of the counters.
+
+        Returns:
+        - dict: Requests, errors, average and max latency in milliseconds, and the last error.
+        """
+        with self._lock:
+            avg_latency = self.total_latency / self.requests if self.requests else 0.0
+            return {
+                "endpoint": self.endpoint,
+                "requests": self.requests,
+                "errors": self.errors,
+                "avg_latency_ms": avg_latency * 1000,
+                "max_latency_ms": self.max_latency * 1000,
+                "last_error": self.last_error,
+            }
+
+
+def _response_error(response: dict) -> Optional[str]:
+    """
+    Extract the JSON-RPC error message from a decoded response, if any.
+    """
+    error = response.get('error') if isinstance(response, dict) else None
+    if error is None:
+        return None
+    if isinstance(error, dict):
+        return str(error.get('message', error))
+    return str(error)
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTP provider bound to a shared keep-alive session that records per-endpoint metrics.
+    """
+
+    def __init__(self, endpoint_uri: str, session: requests.Session, stats: EndpointStats, request_kwargs: Optional[dict] = None):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs, session=session)
+        self.stats = stats
+
+    def make_request(self, method, params):
+        start = time.perf_counter()
+        try:
+            response = super().make_request(method, params)
+        except Exception as e:
+            self.stats.record(time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+            raise
+        self.stats.record(time.perf_counter() - start, error=_response_error(response))
+        return response
+
+
+async def _close_at_loop_shutdown(session):
+    """
+    Async generator closing `session` when it is finalized, i.e. by `loop.shutdown_asyncgens()` at the latest.
+    """
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+class PooledAsyncHTTPProvider(AsyncHTTPProvider):
+    """
+    Async HTTP provider keeping one aiohttp keep-alive session per event loop and recording per-endpoint metrics.
+
+    aiohttp sessions are bound to the loop they were created on, so a session is opened lazily for
+    every running loop that uses the provider and closed on that loop: by `aclose`, or when the loop
+    shuts down its async generators, as `asyncio.run` does before closing the loop.
+    """
+
+    def __init__(self, endpoint_uri: str, stats: EndpointStats, pool_maxsize: int, request_timeout: float):
+        super().__init__(endpoint_uri)
+        self.stats = stats
+        self.pool_maxsize = pool_maxsize
+        self.request_timeout = request_timeout
+        # Event loop -> (session, async generator closing it at the loop's shutdown)
+        self._sessions = weakref.WeakKeyDictionary()
+
+    async def _session_for_running_loop(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session, closer = self._sessions.get(loop, (None, None))
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={'Content-Type': 'application/json'},
+            )
+            closer = _close_at_loop_shutdown(session)
+            self._sessions[loop] = (session, closer)
+            # Started on the loop, so the loop finalizes it before closing
+            await closer.__anext__()
+        return session
+
+    async def make_request(self, method, params):
+        start = time.perf_counter()
+        try:
+            session = await self._session_for_running_loop()
+            request_data = self.encode_rpc_request(method, params)
+            async with session.post(self.endpoint_uri, data=request_data) as raw_response:
+                raw_response.raise_for_status()
+                response = self.decode_rpc_response(await raw_response.read())
+        except Exception as e:
+            self.stats.record(time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+            raise
+        self.stats.record(time.perf_counter() - start, error=_response_error(response))
+        return response
+
+    async def aclose(self):
+        """
+        Close the session opened for the running event loop, if any.
+        """
+        session, closer = self._sessions.pop(asyncio.get_running_loop(), (None, None))
+        if session is not None:
+            await closer.aclose()
+
+    def close(self, timeout: float = 5.0):
+        """
+        Close the sessions of every event loop, from any thread.
+
+        Sessions of loops running in another thread are closed on their loop and sessions of stopped loops
+        by running the loop until done. Sessions of loops that were closed without shutting down their async
+        generators can no longer be closed on their loop: their connector is closed synchronously and the sockets
+        it held are left to the garbage collector.
+
+        Args:
+        - timeout (float): Seconds to wait for each session running on another thread's loop.
+        """
+        sessions = list(self._sessions.items())
+        self._sessions.clear()
+        for loop, (session, closer) in sessions:
+            if session.closed:
+                continue
+            if loop.is_closed():
+                session.connector._close()
+            elif loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(closer.aclose(), loop)
+                try:
+                    running = asyncio.get_running_loop()
+                except RuntimeError:
+                    running = None
+                # Waiting from the loop's own thread would deadlock, the close then runs once it yields
+                if running is not loop:
+                    future.result(timeout)
+            else:
+                loop.run_until_complete(closer.aclose())
+
+
+class NewHeadsSubscription:
+    """
+    Background `eth_subscribe("newHeads")` listener over a websocket endpoint.
+
+    A single connection is kept per endpoint and every registered callback receives each new block
+    header as a dict. The listener reconnects with exponential backoff when the socket drops.
+    """
+
+    def __init__(self, ws_url: str, stats: EndpointStats, max_backoff: float = 30.0):
+        self.ws_url = ws_url
+        self.stats = stats
+        self.max_backoff = max_backoff
+        self._callbacks: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._socket = None
+        self._thread = threading.Thread(target=self._run, name=f"newHeads-{ws_url}", daemon=True)
+
+    def add_callback(self, callback: Callable[[dict], None]):
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[dict], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def start(self):
+        if not self._thread.is_alive() and not self._stop.is_set():
+            try:
+                self._thread.start()
+            except RuntimeError:
+                # Already started by a concurrent caller
+                pass
+
+    def stop(self):
+        self._stop.set()
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except Exception:
+                pass
+
+    def _subscribe(self):
+        start = time.perf_counter()
+        self._socket = websocket.create_connection(self.ws_url, timeout=self.max_backoff)
+        self._socket.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+        response = json.loads(self._socket.recv())
+        error = _response_error(response)
+        self.stats.record(time.perf_counter() - start, error=error)
+        if error is not None:
+            raise ConnectionError(f"newHeads subscription rejected by {self.ws_url}: {error}")
+        # Headers arrive at block cadence, so reads block until the next one or a disconnect
+        self._socket.settimeout(None)
+
+    def _dispatch(self, header: dict):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(header)
+            except Exception:
+                # A faulty consumer must not kill the shared listener
+                pass
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            # Start of the operation in progress, so a failure is recorded with the time it took
+            started = time.perf_counter()
+            try:
+                self._subscribe()
+                backoff = 1.0
+                while not self._stop.is_set():
+                    started = time.perf_counter()
+                    message = json.loads(self._socket.recv())
+                    params = message.get('params')
+                    if message.get('method') == 'eth_subscription' and params:
+                        self._dispatch(params['result'])
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.stats.record(time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                if self._socket is not None:
+                    try:
+                        self._socket.close()
+                    except Exception:
+                        pass
+                    self._socket = None
+
+
+class Web3ProviderManager:
+    """
+    Process-wide registry of Web3 instances, one per RPC endpoint.
+
+    Clients pointing at the same endpoint share a single Web3 instance and the keep-alive connection
+    pool behind it, instead of opening their own sockets.
+
+    Attributes:
+    - pool_maxsize (int): Maximum number of pooled connections kept per endpoint.
+    - request_timeout (float): Timeout in seconds applied to HTTP requests.
+    """
+
+    def __init__(self, pool_maxsize: int = 16, request_timeout: float = 10.0):
+        self.pool_maxsize = pool_maxsize
+        self.request_timeout = request_timeout
+        self._lock = threading.Lock()
+        self._web3: Dict[str, Web3] = {}
+        self._async_web3: Dict[str, Web3] = {}
+        self._websocket_web3: Dict[str, Web3] = {}
+        self._subscriptions: Dict[str, NewHeadsSubscription] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, EndpointStats] = {}
+
+    def _stats_for(self, key: str) -> EndpointStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = EndpointStats(key)
+        return stats
+
+    def _session_for(self, rpc_url: str) -> requests.Session:
+        session = self._sessions.get(rpc_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions[rpc_url] = session
+        return session
+
+    def register(self, rpc_url: str, web3: Web3):
+        """
+        Register an externally built Web3 instance (e.g. an in-process test chain) for an endpoint.
+
+        Args:
+        - rpc_url (str): The key clients use to look the endpoint up.
+        - web3 (Web3): The instance to hand out for that key.
+        """
+        with self._lock:
+            self._web3[rpc_url] = web3
+
+    def get_web3(self, rpc_url: str) -> Web3:
+        """
+        Return the shared synchronous Web3 instance for an HTTP endpoint.
+
+        Args:
+        - rpc_url (str): HTTP(S) JSON-RPC endpoint.
+
+        Returns:
+        - Web3: Instance backed by the endpoint's pooled session.
+        """
+        with self._lock:
+            web3 = self._web3.get(rpc_url)
+            if web3 is None:
+                provider = PooledHTTPProvider(
+                    rpc_url,
+                    session=self._session_for(rpc_url),
+                    stats=self._stats_for(rpc_url),
+                    request_kwargs={'timeout': self.request_timeout},
+                )
+                web3 = self._web3[rpc_url] = Web3(provider)
+            return web3
+
+    def get_async_web3(self, rpc_url: str) -> Web3:
+        """
+        Return the shared asynchronous Web3 instance for an HTTP endpoint.
+
+        Calls made through it can be awaited concurrently, e.g. with `asyncio.gather`.
+
+        Args:
+        - rpc_url (str): HTTP(S) JSON-RPC endpoint.
+
+        Returns:
+        - Web3: Async instance exposing the `eth` and `net` modules.
+        """
+        with self._lock:
+            web3 = self._async_web3.get(rpc_url)
+            if web3 is None:
+                provider = PooledAsyncHTTPProvider(
+                    rpc_url,
+                    stats=self._stats_for(rpc_url),
+                    pool_maxsize=self.pool_maxsize,
+                    request_timeout=self.request_timeout,
+                )
+                web3 = self._async_web3[rpc_url] = Web3(
+                    provider,
+                    modules={'eth': (AsyncEth,), 'net': (AsyncNet,)},
+                    middlewares=[],
+                )
+            return web3
+
+    def get_websocket_web3(self, ws_url: str) -> Web3:
+        """
+        Return the shared Web3 instance for a websocket endpoint.
+
+        Args:
+        - ws_url (str): WS(S) JSON-RPC endpoint.
+
+        Returns:
+        - Web3: Instance backed by a persistent websocket connection.
+        """
+        with self._lock:
+            web3 = self._websocket_web3.get(ws_url)
+            if web3 is None:
+                provider = WebsocketProvider(ws_url, websocket_timeout=self.request_timeout)
+                web3 = self._websocket_web3[ws_url] = Web3(provider)
+            return web3
+
+    def subscribe_new_heads(self, ws_url: str, callback: Callable[[dict], None]) -> NewHeadsSubscription:
+        """
+        Call `callback` with every new block header announced by a websocket endpoint.
+
+        All callbacks for the same endpoint share one subscription.
+
+        Args:
+        - ws_url (str): WS(S) JSON-RPC endpoint.
+        - callback (callable): Receives the block header dict.
+
+        Returns:
+        - NewHeadsSubscription: The shared listener, e.g. to remove the callback later.
+        """
+        with self._lock:
+            subscription = self._subscriptions.get(ws_url)
+            if subscription is None:
+                subscription = self._subscriptions[ws_url] = NewHeadsSubscription(ws_url, self._stats_for(ws_url))
+        subscription.add_callback(callback)
+        subscription.start()
+        return subscription
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Return latency and error counters for every endpoint used so far.
+
+        Returns:
+        - dict: Endpoint URL mapped to its counters snapshot.
+        """
+        with self._lock:
+            stats = list(self._stats.values())
+        return {endpoint_stats.endpoint: endpoint_stats.snapshot() for endpoint_stats in stats}
+
+    def close(self):
+        """
+        Stop subscriptions and close every provider: pooled HTTP sessions, aiohttp sessions and websocket connections.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            sessions = list(self._sessions.values())
+            async_web3 = list(self._async_web3.values())
+            websocket_web3 = list(self._websocket_web3.values())
+            self._subscriptions.clear()
+            self._sessions.clear()
+            self._web3.clear()
+            self._async_web3.clear()
+            self._websocket_web3.clear()
+
+        for subscription in subscriptions:
+            subscription.stop()
+        for session in sessions:
+            session.close()
+        for web3 in async_web3:
+            web3.provider.close()
+        for web3 in websocket_web3:
+            _close_websocket(web3.provider, self.request_timeout)
+
+
+def _close_websocket(provider: WebsocketProvider, timeout: float):
+    """
+    Close the persistent connection of a websocket provider on the event loop thread it runs on.
+    """
+    connection = provider.conn.ws
+    if connection is None:
+        return
+    provider.conn.ws = None
+    try:
+        asyncio.run_coroutine_threadsafe(connection.close(), WebsocketProvider._loop).result(timeout)
+    except Exception:
+        # The socket is being discarded anyway
+        pass
+
+
+# Shared by every DEX client in the process
+provider_manager = Web3ProviderManager()